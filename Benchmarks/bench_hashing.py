@@ -0,0 +1,99 @@
+"""Login latency and throughput: legacy SHA-256 vs the KDF inline vs in a process pool.
+
+Logins run through UserRepository on an in-memory SQLite database from
+concurrent threads, the way request threads call it.
+
+Run with: python Benchmarks/bench_hashing.py [--threads T] [--seconds S] [--algorithm A]
+"""
+import argparse
+import hashlib
+import hmac
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Common'))
+
+from password_hasher import ALGORITHMS, HASH_TARGET_MS, PasswordHasher
+from user_repository import UserRepository
+
+USERS = 50
+
+
+class LegacyHasher:
+    """The unsalted SHA-256 every database class used before the KDF"""
+    processes = 0
+
+    def hash(self, password):
+        return hashlib.sha256(password.encode()).hexdigest()
+
+    def verify(self, password, stored):
+        return hmac.compare_digest(self.hash(password), stored), False
+
+    def describe(self):
+        return "sha256 (legacy)"
+
+    def shutdown(self):
+        pass
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run(label, hasher, threads, seconds):
+    """Log in from threads concurrently for seconds and print the latency profile"""
+    repository = UserRepository('sqlite::memory:', hasher)
+    for i in range(USERS):
+        repository.register_user(f"User {i}", f"user{i}@example.com", "5550100", "correct horse")
+
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client(offset):
+        own = []
+        i = offset
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            success, _, _ = repository.login_user(f"user{i % USERS}@example.com", "correct horse")
+            own.append(time.perf_counter() - started)
+            assert success
+            i += 1
+        with lock:
+            latencies.extend(own)
+
+    workers = [threading.Thread(target=client, args=(n,)) for n in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    hasher.shutdown()
+
+    print(f"   {label:<26} {len(latencies) / elapsed:8.1f} logins/s   "
+          f"p50 {percentile(latencies, 0.50) * 1000:7.1f}ms   "
+          f"p99 {percentile(latencies, 0.99) * 1000:7.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16, help="Concurrent login callers")
+    parser.add_argument('--seconds', type=float, default=5.0, help="Duration of each run")
+    parser.add_argument('--algorithm', choices=ALGORITHMS, default='scrypt')
+    parser.add_argument('--target-ms', type=float, default=HASH_TARGET_MS, help="Calibration target")
+    args = parser.parse_args()
+
+    pooled = PasswordHasher(args.algorithm, target_ms=args.target_ms)
+    inline = PasswordHasher(args.algorithm, cost=pooled.cost, processes=0)
+    print(f"📊 {args.threads} threads, {args.seconds:g}s per run, {pooled.describe()}")
+    run("legacy sha256", LegacyHasher(), args.threads, args.seconds)
+    run("KDF on request threads", inline, args.threads, args.seconds)
+    run("KDF in process pool", pooled, args.threads, args.seconds)
+
+
+if __name__ == '__main__':
+    main()
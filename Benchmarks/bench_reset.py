@@ -0,0 +1,121 @@
+"""Password reset: validate + two UPDATEs vs UserRepository.reset_password.
+
+Both paths hash the new password with a cheap PBKDF2 cost, so mostly
+database work is timed, and report the statements they run per reset.
+The default in-memory SQLite database has no network round trips; point
+--database at MySQL to see what the saved round trips are worth.
+
+Run with: python Benchmarks/bench_reset.py [--resets N] [--database URL]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Common'))
+
+from password_hasher import PasswordHasher
+from query_stats import queries
+from user_repository import UserRepository, token_digest
+
+NEW_PASSWORD = "new horse battery"
+
+
+def legacy_reset(repository, token):
+    """The flow before the atomic claim: SELECT, then two UPDATEs in a transaction"""
+    digest = token_digest(token)
+    valid, message, email = repository._check_token(repository.backend.fetch_one('token', (digest,)))
+    if not valid:
+        return False
+    new_hash = repository.hash_password(NEW_PASSWORD)
+    with repository.backend.transaction() as tx:
+        valid, message, email = repository._check_token(tx.fetch_one('token', (digest,)))
+        if not valid:
+            return False
+        tx.execute('update_password', (new_hash, email))
+        tx.execute('mark_token_used', (digest,))
+    return True
+
+
+def repository_reset(repository, token):
+    """What /reset_password runs"""
+    return repository.reset_password(token, NEW_PASSWORD)[0]
+
+
+def statements_run():
+    return sum(entry['count'] for entry in queries.stats()['statements'].values())
+
+
+def issue_tokens(repository, count):
+    return [repository.create_reset_token("reset-bench@example.com")[1] for _ in range(count)]
+
+
+def time_resets(label, reset, repository, count):
+    tokens = issue_tokens(repository, count)
+    statements = statements_run()
+    started = time.perf_counter()
+    for token in tokens:
+        assert reset(repository, token)
+    elapsed = time.perf_counter() - started
+    per_reset = (statements_run() - statements) / count
+    print(f"   {label:<28} {elapsed / count * 1e6:9.1f} µs/reset, {per_reset:.1f} statements/reset")
+    return elapsed / count
+
+
+def hashed_for_junk_tokens(repository, count):
+    """How many resets with unknown tokens ran the password KDF"""
+    hashed = []
+    hash_password = repository.hash_password
+    repository.hash_password = lambda password: hashed.append(1) or hash_password(password)
+    try:
+        for _ in range(count):
+            assert not repository_reset(repository, "not-a-token")
+    finally:
+        del repository.hash_password
+    return len(hashed)
+
+
+def race(reset, repository, threads=8):
+    """How many of threads concurrent resets with one token succeed"""
+    token = issue_tokens(repository, 1)[0]
+    barrier = threading.Barrier(threads)
+    wins = []
+
+    def attempt():
+        barrier.wait()
+        try:
+            if reset(repository, token):
+                wins.append(1)
+        except repository.Error:
+            pass
+
+    workers = [threading.Thread(target=attempt) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return len(wins)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--resets', type=int, default=5000, help="Resets timed per path")
+    parser.add_argument('--database', default='sqlite::memory:', help="mysql://... or sqlite:PATH")
+    args = parser.parse_args()
+
+    repository = UserRepository(args.database, PasswordHasher(cost=1000, algorithm='pbkdf2_sha256', processes=0))
+    repository.register_user("Bench", "reset-bench@example.com", "5550100", "correct horse")
+
+    print(f"📊 {args.resets} resets on {repository.backend.name}")
+    legacy = time_resets("validate + 2 UPDATEs", legacy_reset, repository, args.resets)
+    atomic = time_resets("reset_password", repository_reset, repository, args.resets)
+    repository.enable_token_cache()
+    cached = time_resets("reset_password, token cache", repository_reset, repository, args.resets)
+    print(f"   speedup: {legacy / atomic:.2f}x, {legacy / cached:.2f}x with the token cache")
+    print(f"   unknown tokens hashed before refusal: {hashed_for_junk_tokens(repository, 100)} of 100")
+    print(f"   8 concurrent resets of one token: reset_password lets {race(repository_reset, repository)} succeed")
+
+
+if __name__ == '__main__':
+    main()
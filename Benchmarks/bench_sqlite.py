@@ -0,0 +1,138 @@
+"""SQLite under concurrent signups: connect per call vs pooled vs WAL + writer queue.
+
+Threads run a mix of signups (INSERT) and email lookups against a fresh
+database file for each mode:
+  connect   a new sqlite3 connection per call, as SignupDB used to do
+  sqlite    the pooled rollback-journal backend (sqlite:PATH)
+  wal       per-thread readers and one queued writer (sqlite-wal:PATH)
+Failed operations ("database is locked" and friends) are counted, not retried.
+
+Run with: python Benchmarks/bench_sqlite.py [--threads N] [--ops N] [--write-ratio F]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Common'))
+
+from db_backends import SQLiteBackend, create_backend
+
+PASSWORD_HASH = "pbkdf2_sha256$1000$c2FsdA$aGFzaA"
+SEED_USERS = 1000
+
+
+class ConnectPerCall:
+    """The pre-pool SignupDB access pattern: open, run, commit, close"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def insert(self, row):
+        connection = sqlite3.connect(self.path)
+        try:
+            connection.execute("PRAGMA foreign_keys = ON")
+            connection.execute(SQLiteBackend.statements['insert_user'], row)
+            connection.commit()
+        finally:
+            connection.close()
+
+    def exists(self, email):
+        connection = sqlite3.connect(self.path)
+        try:
+            connection.execute("PRAGMA foreign_keys = ON")
+            return connection.execute(SQLiteBackend.statements['email_exists'], (email,)).fetchone() is not None
+        finally:
+            connection.close()
+
+
+class BackendClient:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def insert(self, row):
+        with self.backend.session() as session:
+            session.execute('insert_user', row)
+
+    def exists(self, email):
+        return self.backend.fetch_one('email_exists', (email,)) is not None
+
+
+def percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def run_mode(label, client, threads, ops, write_ratio):
+    latencies = []
+    errors = {}
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def worker(index):
+        rng = random.Random(index)
+        local = []
+        barrier.wait()
+        for op in range(ops):
+            started = time.perf_counter()
+            try:
+                if rng.random() < write_ratio:
+                    client.insert((f"User {index}-{op}", f"bench-{index}-{op}@example.com", "5550100", PASSWORD_HASH))
+                else:
+                    client.exists(f"seed-{rng.randrange(SEED_USERS)}@example.com")
+            except Exception as e:
+                with lock:
+                    errors[str(e)] = errors.get(str(e), 0) + 1
+                continue
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    failed = sum(errors.values())
+    print(f"   {label:<10} {len(latencies) / elapsed:9.0f} ops/s   "
+          f"p50 {percentile(latencies, 0.5) * 1000:7.2f}ms   p99 {percentile(latencies, 0.99) * 1000:7.2f}ms   "
+          f"errors {failed}")
+    for message, count in errors.items():
+        print(f"      {count} x {message}")
+
+
+def seed(backend):
+    rows = [(f"Seed {i}", f"seed-{i}@example.com", "5550100", PASSWORD_HASH) for i in range(SEED_USERS)]
+    with backend.transaction() as tx:
+        tx.execute_many('insert_user', rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=32, help="Concurrent client threads")
+    parser.add_argument('--ops', type=int, default=500, help="Operations per thread")
+    parser.add_argument('--write-ratio', type=float, default=0.3, help="Fraction of operations that are signups")
+    parser.add_argument('--modes', default='connect,sqlite,wal', help="Comma-separated modes to run")
+    args = parser.parse_args()
+
+    print(f"📊 {args.threads} threads x {args.ops} ops, {args.write_ratio:.0%} signups")
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in args.modes.split(','):
+            path = os.path.join(directory, f"{mode}.db")
+            backend = create_backend(f"sqlite-wal:{path}" if mode == 'wal' else f"sqlite:{path}")
+            backend.init_schema()
+            seed(backend)
+            client = ConnectPerCall(path) if mode == 'connect' else BackendClient(backend)
+            run_mode(mode, client, args.threads, args.ops, args.write_ratio)
+            backend.pool.close_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,285 @@
+"""Load test the servers over raw sockets: open or closed loop, scripted scenarios.
+
+By default a Gateway server is started locally on a fresh SQLite database
+(on /dev/shm when available), seeded with --seed-users users, and has its
+login throttle and per-address connection limit turned off so the load
+generator is not rate limited. --target host:port tests a running server
+instead, e.g. one started against MySQL.
+
+Closed loop: --concurrency virtual users each run scenarios back to back.
+Open loop: --rate scenario runs start per second whatever the server does,
+and each is timed from its scheduled start, so queueing shows up in the
+latencies instead of silently lowering the load.
+
+Scenarios (mix them with weights, e.g. login:8,signup-login:1,reset-storm:1):
+  health         GET /api/health
+  login          POST /api/login as a seeded user
+  signup-login   OPTIONS preflight, POST /api/signup, POST /api/login
+  reset-storm    POST /send_reset_link for a seeded user, then /validate_token
+
+Results are saved as JSON (--output) and can be compared with --compare.
+
+Run with: python Benchmarks/loadtest --scenario login --concurrency 32 --duration 30
+          python Benchmarks/loadtest --scenario signup-login --rate 200 --compare Benchmarks/results/run.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shlex
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARKS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BENCHMARKS, '..', 'Common'))
+
+from client import HTTPClient, ResponseError
+from scenarios import SEED_EMAIL, SEED_PASSWORD, Context, parse_mix
+from stats import Recorder, ResourceSampler, loadgen_usage, print_comparison, print_report
+
+SERVERS = {
+    'gateway': os.path.join('Gateway', 'gateway_server.py'),
+    'login': os.path.join('Loginpage', 'login_server.py'),
+    'signup': os.path.join('Signup', 'signup_server.py'),
+    'forgetpassword': os.path.join('Forgetpassword', 'forgetpassword_server.py'),
+}
+RESULTS_DIR = os.path.join(BENCHMARKS, 'results')
+# A scenario run that ends in one of these counts as a failed iteration;
+# ValueError covers unparsable Content-Length headers and JSON bodies
+REQUEST_ERRORS = (OSError, ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError,
+                  ResponseError, ValueError)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def seed_users(database, count, hash_algorithm, hash_cost):
+    """Insert count users sharing one password hash, so seeding costs a single KDF call"""
+    from db_backends import create_backend
+    from password_hasher import PasswordHasher
+
+    hasher = PasswordHasher(hash_algorithm, hash_cost, processes=0)
+    password_hash = hasher.hash(SEED_PASSWORD)
+    backend = create_backend(database, "Load test seed")
+    backend.init_schema()
+    rows = [("Load Test", SEED_EMAIL.format(i), "5550100", password_hash) for i in range(count)]
+    with backend.transaction() as tx:
+        tx.execute_many('insert_user_ignore', rows)
+    backend.pool.close_all()
+    return hasher.cost
+
+
+class LocalServer:
+    """A server process started for the run, stopped when it ends"""
+
+    def __init__(self, kind, database, hash_algorithm, hash_cost, extra_args, log_path):
+        self.port = free_port()
+        self.command = [
+            sys.executable, os.path.join(BENCHMARKS, '..', SERVERS[kind]),
+            '--port', str(self.port), '--database', database,
+            '--hash-algorithm', hash_algorithm, '--hash-cost', str(hash_cost),
+            '--throttle-email-rate', '0', '--throttle-ip-rate', '0',
+            '--max-connections-per-ip', '0',
+        ] + extra_args
+        self.log = open(log_path, 'w') if log_path else subprocess.DEVNULL
+        self.process = None
+
+    def start(self, timeout=60.0):
+        self.process = subprocess.Popen(self.command, stdout=self.log, stderr=subprocess.STDOUT)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise SystemExit(f"❌ Server exited with status {self.process.returncode}: {' '.join(self.command)}")
+            with socket.socket() as s:
+                if s.connect_ex(('127.0.0.1', self.port)) == 0:
+                    return
+            time.sleep(0.1)
+        self.stop()
+        raise SystemExit("❌ Server did not start listening in time")
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        if self.log is not subprocess.DEVNULL:
+            self.log.close()
+
+
+async def closed_loop(host, port, ctx, mix, concurrency, deadline, timeout):
+    functions, weights = mix
+
+    async def virtual_user():
+        client = HTTPClient(host, port, timeout)
+        while time.perf_counter() < deadline:
+            scenario = random.choices(functions, weights)[0]
+            started = time.perf_counter()
+            ok = True
+            try:
+                await scenario(client, ctx)
+            except REQUEST_ERRORS:
+                ok = False
+                await asyncio.sleep(0.01)
+            ctx.recorder.iteration(time.perf_counter() - started, ok)
+        client.close()
+
+    await asyncio.gather(*(virtual_user() for _ in range(concurrency)))
+
+
+async def open_loop(host, port, ctx, mix, rate, deadline, timeout, max_connections):
+    functions, weights = mix
+    idle = []
+    slots = asyncio.Semaphore(max_connections)
+    tasks = set()
+
+    async def arrival(scheduled):
+        async with slots:
+            client = idle.pop() if idle else HTTPClient(host, port, timeout)
+            ok = True
+            try:
+                await random.choices(functions, weights)[0](client, ctx)
+            except REQUEST_ERRORS:
+                ok = False
+            idle.append(client)
+        ctx.recorder.iteration(time.perf_counter() - scheduled, ok)
+
+    started = time.perf_counter()
+    sent = 0
+    while True:
+        scheduled = started + sent / rate
+        if scheduled >= deadline:
+            break
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.ensure_future(arrival(scheduled))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        sent += 1
+    if tasks:
+        await asyncio.wait(tasks, timeout=timeout)
+    for client in idle:
+        client.close()
+
+
+async def fetch_stats(host, port):
+    client = HTTPClient(host, port, 5.0)
+    try:
+        status, data = await client.request('GET', '/stats')
+        return json.loads(data) if status == 200 else None
+    except REQUEST_ERRORS:
+        return None
+    finally:
+        client.close()
+
+
+async def run(args, host, port, pid):
+    recorder = Recorder()
+    ctx = Context(recorder, args.seed_users)
+    mix = parse_mix(args.scenario)
+    sampler = ResourceSampler(pid)
+
+    async def measure():
+        await asyncio.sleep(args.warmup)
+        recorder.start()
+        sampler.start()
+
+    deadline = time.perf_counter() + args.warmup + args.duration
+    measuring = asyncio.ensure_future(measure())
+    cpu_before = loadgen_usage()
+    if args.rate:
+        await open_loop(host, port, ctx, mix, args.rate, deadline, args.timeout, args.max_connections)
+    else:
+        await closed_loop(host, port, ctx, mix, args.concurrency, deadline, args.timeout)
+    recorder.stop()
+    sampler.stop()
+    await measuring
+
+    result = recorder.summary()
+    result['loadgen_cpu_percent'] = round((loadgen_usage() - cpu_before) / (args.warmup + args.duration) * 100, 1)
+    result['server_resources'] = sampler.summary()
+    result['server_stats'] = await fetch_stats(host, port)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog='\n'.join(__doc__.splitlines()[2:]))
+    parser.add_argument('--scenario', default='login', help="Scenario or weighted mix, e.g. login:8,signup-login:1")
+    parser.add_argument('--duration', type=float, default=20.0, help="Seconds measured")
+    parser.add_argument('--warmup', type=float, default=3.0, help="Seconds run before measuring")
+    parser.add_argument('--concurrency', type=int, default=32, help="Closed loop: concurrent virtual users")
+    parser.add_argument('--rate', type=float, default=0, help="Open loop: scenario runs started per second")
+    parser.add_argument('--max-connections', type=int, default=1000, help="Open loop: connections at most")
+    parser.add_argument('--timeout', type=float, default=10.0, help="Seconds before a request counts as timed out")
+    parser.add_argument('--target', help="host:port of a running server instead of starting one")
+    parser.add_argument('--server-pid', type=int, help="With --target: process to sample CPU and memory of")
+    parser.add_argument('--server', choices=SERVERS, default='gateway', help="Server started locally")
+    parser.add_argument('--server-args', default='', help="Extra options for the local server, e.g. '--engine eventloop'")
+    parser.add_argument('--server-log', help="File for the local server's output (default: discarded)")
+    parser.add_argument('--database', help="Database of the local server (default: fresh SQLite file)")
+    parser.add_argument('--seed-users', type=int, default=1000, help="Users created before the run")
+    parser.add_argument('--hash-algorithm', default='scrypt', help="Password hashing of the local server")
+    parser.add_argument('--hash-cost', type=int, default=0, help="KDF cost of the local server (0: calibrated)")
+    parser.add_argument('--output', help="Where to save the results (default: Benchmarks/results/<time>-<scenario>.json)")
+    parser.add_argument('--compare', help="Earlier results file to compare this run with")
+    args = parser.parse_args()
+
+    server = None
+    workdir = None
+    if args.target:
+        host, _, port = args.target.rpartition(':')
+        host, port, pid = host or '127.0.0.1', int(port), args.server_pid
+        print(f"🎯 Testing {host}:{port}")
+    else:
+        workdir = tempfile.mkdtemp(prefix='shiftxpress-load-', dir='/dev/shm' if os.path.isdir('/dev/shm') else None)
+        database = args.database or f"sqlite:{os.path.join(workdir, 'load.db')}"
+        hash_cost = seed_users(database, args.seed_users, args.hash_algorithm, args.hash_cost)
+        server = LocalServer(args.server, database, args.hash_algorithm, hash_cost,
+                             shlex.split(args.server_args), args.server_log)
+        server.start()
+        host, port, pid = '127.0.0.1', server.port, server.process.pid
+        print(f"🚀 Started {args.server} server on port {port} ({database}, "
+              f"{args.hash_algorithm} cost {hash_cost}, {args.seed_users} users)")
+
+    mode = f"open loop at {args.rate:g}/s" if args.rate else f"closed loop with {args.concurrency} users"
+    print(f"🔥 {args.scenario}, {mode}, {args.warmup:g}s warmup + {args.duration:g}s")
+    try:
+        result = asyncio.run(run(args, host, port, pid))
+    finally:
+        if server:
+            server.stop()
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    result['config'] = vars(args)
+    result['started_at'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+    print_report(result)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{args.scenario.replace(':', '').replace(',', '+')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    result['saved_as'] = output
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"💾 Saved to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(result, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
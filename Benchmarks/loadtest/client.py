@@ -0,0 +1,74 @@
+import asyncio
+import json
+
+
+class ResponseError(Exception):
+    """The server answered with something that is not a valid HTTP response"""
+
+
+class HTTPClient:
+    """One keep-alive HTTP/1.1 connection over raw asyncio streams.
+
+    Requests are written as single buffers and responses framed by
+    Content-Length only, which is all the servers send. The connection is
+    reopened on the next request after the server closes it.
+    """
+
+    def __init__(self, host, port, timeout=10.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
+        self.connects = 0
+
+    async def request(self, method, path, body=None, headers=None):
+        """(status, body bytes) of one request, reconnecting first if needed"""
+        try:
+            return await asyncio.wait_for(self._request(method, path, body, headers), self.timeout)
+        except BaseException:
+            self.close()
+            raise
+
+    async def _request(self, method, path, body, headers):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            self.connects += 1
+
+        payload = json.dumps(body).encode() if body is not None else b""
+        head = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}"]
+        if body is not None:
+            head.append("Content-Type: application/json")
+        head.append(f"Content-Length: {len(payload)}")
+        for name, value in (headers or {}).items():
+            head.append(f"{name}: {value}")
+        self.writer.write(("\r\n".join(head) + "\r\n\r\n").encode('latin-1') + payload)
+
+        try:
+            raw = await self.reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            raise ConnectionResetError("connection closed by server")
+        lines = raw.decode('latin-1').split("\r\n")
+        parts = lines[0].split(' ', 2)
+        if len(parts) < 2 or not parts[1].isdigit():
+            raise ResponseError(f"bad status line {lines[0]!r}")
+        status = int(parts[1])
+
+        length = 0
+        close = False
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            name = name.strip().lower()
+            if name == 'content-length':
+                length = int(value)
+            elif name == 'connection':
+                close = value.strip().lower() == 'close'
+        data = await self.reader.readexactly(length) if length else b""
+        if close:
+            self.close()
+        return status, data
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
@@ -0,0 +1,82 @@
+import itertools
+import json
+import random
+import time
+
+SEED_PASSWORD = "load-test-password"
+SEED_EMAIL = "load-{}@example.com"
+
+
+class Context:
+    """What scenarios share during a run: the recorder, seeded users and counters"""
+
+    def __init__(self, recorder, seed_users):
+        self.recorder = recorder
+        self.seed_users = seed_users
+        self._signups = itertools.count()
+        self._run_id = int(time.time())
+
+    def seeded_email(self):
+        return SEED_EMAIL.format(random.randrange(self.seed_users))
+
+    def new_email(self):
+        return f"signup-{self._run_id}-{next(self._signups)}@example.com"
+
+    async def step(self, client, name, method, path, body=None, headers=None, expect=(200,)):
+        """Send one request, record it under name and return its JSON body (or None)"""
+        return await self.recorder.timed(name, client.request(method, path, body, headers), expect)
+
+
+async def health(client, ctx):
+    await ctx.step(client, 'health', 'GET', '/api/health')
+
+
+async def login(client, ctx):
+    await ctx.step(client, 'login', 'POST', '/api/login',
+                   {'email': ctx.seeded_email(), 'password': SEED_PASSWORD})
+
+
+async def signup_login(client, ctx):
+    """What the signup page does: preflight, sign up, then log in"""
+    email = ctx.new_email()
+    await ctx.step(client, 'preflight', 'OPTIONS', '/api/signup',
+                   headers={'Origin': 'http://localhost:8000', 'Access-Control-Request-Method': 'POST'},
+                   expect=(204,))
+    await ctx.step(client, 'signup', 'POST', '/api/signup',
+                   {'name': 'Load Test', 'email': email, 'phone': '5550100',
+                    'password': SEED_PASSWORD, 'confirmPassword': SEED_PASSWORD}, expect=(201,))
+    await ctx.step(client, 'login', 'POST', '/api/login', {'email': email, 'password': SEED_PASSWORD})
+
+
+async def reset_storm(client, ctx):
+    """Reset links requested for existing users, each followed by the page's token check"""
+    data = await ctx.step(client, 'send_reset_link', 'POST', '/send_reset_link', {'email': ctx.seeded_email()})
+    if data and data.get('token'):
+        await ctx.step(client, 'validate_token', 'POST', '/validate_token', {'token': data['token']})
+
+
+SCENARIOS = {
+    'health': health,
+    'login': login,
+    'signup-login': signup_login,
+    'reset-storm': reset_storm,
+}
+
+
+def parse_mix(spec):
+    """'login:8,signup-login:1' -> (scenario functions, weights)"""
+    functions, weights = [], []
+    for part in spec.split(','):
+        name, _, weight = part.partition(':')
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario '{name}', choose from: {', '.join(SCENARIOS)}")
+        functions.append(SCENARIOS[name])
+        weights.append(float(weight or 1))
+    return functions, weights
+
+
+def decode(data):
+    try:
+        return json.loads(data) if data else None
+    except ValueError:
+        return None
@@ -0,0 +1,246 @@
+import asyncio
+import os
+import resource
+import time
+
+from scenarios import decode
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def percentile(samples, pct):
+    """pct-th percentile of sorted samples (nearest rank)"""
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def latency_summary(samples):
+    samples = sorted(samples)
+    summary = {f"p{pct:g}_ms": round(percentile(samples, pct) * 1000, 3) for pct in PERCENTILES}
+    summary['max_ms'] = round(samples[-1] * 1000, 3) if samples else 0.0
+    summary['mean_ms'] = round(sum(samples) / len(samples) * 1000, 3) if samples else 0.0
+    return summary
+
+
+class Recorder:
+    """Latencies, statuses and errors per step, kept only while recording is on"""
+
+    def __init__(self):
+        self.recording = False
+        self.steps = {}
+        self.iterations = []
+        self.failed_iterations = 0
+        self.started = None
+        self.stopped = None
+
+    def start(self):
+        self.recording = True
+        self.started = time.perf_counter()
+
+    def stop(self):
+        self.recording = False
+        self.stopped = time.perf_counter()
+
+    def _step(self, name):
+        step = self.steps.get(name)
+        if step is None:
+            step = self.steps[name] = {'latencies': [], 'statuses': {}, 'errors': {}}
+        return step
+
+    async def timed(self, name, request, expect):
+        started = time.perf_counter()
+        try:
+            status, data = await request
+        except asyncio.TimeoutError:
+            self.error(name, 'timeout')
+            raise
+        except (OSError, ConnectionError, asyncio.IncompleteReadError) as e:
+            self.error(name, type(e).__name__)
+            raise
+        elapsed = time.perf_counter() - started
+        if self.recording:
+            step = self._step(name)
+            step['latencies'].append(elapsed)
+            step['statuses'][status] = step['statuses'].get(status, 0) + 1
+            if status not in expect:
+                step['errors'][f"status {status}"] = step['errors'].get(f"status {status}", 0) + 1
+        return decode(data) if status in expect else None
+
+    def error(self, name, kind):
+        if self.recording:
+            errors = self._step(name)['errors']
+            errors[kind] = errors.get(kind, 0) + 1
+
+    def iteration(self, elapsed, ok):
+        """One whole scenario run; open loop passes time since its scheduled start"""
+        if self.recording:
+            self.iterations.append(elapsed)
+            if not ok:
+                self.failed_iterations += 1
+
+    def summary(self):
+        duration = (self.stopped or time.perf_counter()) - self.started
+        steps = {}
+        total_requests = total_errors = 0
+        for name, step in self.steps.items():
+            errors = sum(step['errors'].values())
+            requests = len(step['latencies']) + errors - sum(
+                count for kind, count in step['errors'].items() if kind.startswith('status '))
+            total_requests += requests
+            total_errors += errors
+            steps[name] = dict(
+                requests=requests,
+                rps=round(requests / duration, 1),
+                error_rate=round(errors / requests, 4) if requests else 0.0,
+                statuses={str(status): count for status, count in sorted(step['statuses'].items())},
+                errors=step['errors'],
+                **latency_summary(step['latencies'])
+            )
+        return {
+            'duration': round(duration, 3),
+            'requests': total_requests,
+            'rps': round(total_requests / duration, 1),
+            'error_rate': round(total_errors / total_requests, 4) if total_requests else 0.0,
+            'iterations': len(self.iterations),
+            'iterations_per_second': round(len(self.iterations) / duration, 1),
+            'failed_iterations': self.failed_iterations,
+            'iteration_latency': latency_summary(self.iterations),
+            'steps': steps,
+        }
+
+
+class ResourceSampler:
+    """CPU, memory and thread usage of a process tree, sampled from /proc (Linux only).
+
+    Children are included so pre-forked workers and the password hashing
+    pool are counted with the server that started them.
+    """
+
+    def __init__(self, pid, interval=1.0):
+        self.pid = pid
+        self.interval = interval
+        self.ticks = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+        self.samples = []
+        self._task = None
+
+    def available(self):
+        return self.pid is not None and os.path.exists(f"/proc/{self.pid}/stat")
+
+    def _tree(self):
+        parents = {}
+        for entry in os.listdir('/proc'):
+            if entry.isdigit():
+                stat = self._stat(entry)
+                if stat:
+                    parents.setdefault(int(stat[1]), []).append(int(entry))
+        tree, pending = [], [self.pid]
+        while pending:
+            pid = pending.pop()
+            tree.append(pid)
+            pending.extend(parents.get(pid, []))
+        return tree
+
+    def _stat(self, pid):
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                # Fields after the parenthesised command name, which may contain spaces
+                return f.read().rpartition(')')[2].split()
+        except OSError:
+            return None
+
+    def _rss_kib(self, pid):
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        return int(line.split()[1])
+        except OSError:
+            pass
+        return 0
+
+    def sample(self):
+        cpu = threads = rss = 0
+        processes = 0
+        for pid in self._tree():
+            stat = self._stat(pid)
+            if not stat:
+                continue
+            processes += 1
+            cpu += (int(stat[11]) + int(stat[12])) / self.ticks
+            threads += int(stat[17])
+            rss += self._rss_kib(pid)
+        return {'at': time.perf_counter(), 'cpu_seconds': cpu, 'threads': threads,
+                'rss_mib': rss / 1024, 'processes': processes}
+
+    async def run(self):
+        while True:
+            self.samples.append(self.sample())
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.available():
+            self._task = asyncio.ensure_future(self.run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self.samples.append(self.sample())
+
+    def summary(self):
+        if len(self.samples) < 2:
+            return None
+        first, last = self.samples[0], self.samples[-1]
+        cpu_percent = [
+            (b['cpu_seconds'] - a['cpu_seconds']) / (b['at'] - a['at']) * 100
+            for a, b in zip(self.samples, self.samples[1:]) if b['at'] > a['at']
+        ]
+        return {
+            'cpu_seconds': round(last['cpu_seconds'] - first['cpu_seconds'], 3),
+            'avg_cpu_percent': round((last['cpu_seconds'] - first['cpu_seconds'])
+                                     / (last['at'] - first['at']) * 100, 1),
+            'peak_cpu_percent': round(max(cpu_percent), 1) if cpu_percent else 0.0,
+            'peak_rss_mib': round(max(s['rss_mib'] for s in self.samples), 1),
+            'peak_threads': max(s['threads'] for s in self.samples),
+            'peak_processes': max(s['processes'] for s in self.samples),
+        }
+
+
+def loadgen_usage():
+    """CPU used by this process so far; near 100% of a core means the generator is the bottleneck"""
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def print_report(result):
+    print(f"📊 {result['requests']} requests in {result['duration']:.1f}s: "
+          f"{result['rps']:.0f} req/s, {result['error_rate']:.2%} errors, "
+          f"{result['iterations_per_second']:.0f} scenario runs/s")
+    print(f"   {'step':<16} {'req/s':>8} {'p50':>9} {'p90':>9} {'p99':>9} {'p99.9':>9} {'max':>9}  errors")
+    rows = list(result['steps'].items()) + [('(scenario)', dict(rps=result['iterations_per_second'],
+                                                                 errors={'failed': result['failed_iterations']}
+                                                                 if result['failed_iterations'] else {},
+                                                                 **result['iteration_latency']))]
+    for name, step in rows:
+        errors = ', '.join(f"{count} {kind}" for kind, count in step['errors'].items()) or '-'
+        print(f"   {name:<16} {step['rps']:>8.0f} {step['p50_ms']:>7.2f}ms {step['p90_ms']:>7.2f}ms "
+              f"{step['p99_ms']:>7.2f}ms {step['p99.9_ms']:>7.2f}ms {step['max_ms']:>7.2f}ms  {errors}")
+    server = result.get('server_resources')
+    if server:
+        print(f"   server: {server['avg_cpu_percent']:.0f}% CPU avg ({server['peak_cpu_percent']:.0f}% peak), "
+              f"{server['peak_rss_mib']:.0f} MiB RSS, {server['peak_threads']} threads, "
+              f"{server['peak_processes']} processes")
+    print(f"   load generator: {result['loadgen_cpu_percent']:.0f}% CPU")
+
+
+def print_comparison(result, previous):
+    """Per-step change against an earlier saved run"""
+    print(f"📊 Compared with {previous.get('saved_as', 'previous run')}:")
+    for name, step in result['steps'].items():
+        before = previous.get('steps', {}).get(name)
+        if not before:
+            continue
+        print(f"   {name:<16} req/s {before['rps']:>8.0f} -> {step['rps']:<8.0f} "
+              f"p50 {before['p50_ms']:.2f} -> {step['p50_ms']:.2f}ms   "
+              f"p99 {before['p99_ms']:.2f} -> {step['p99_ms']:.2f}ms   "
+              f"errors {before['error_rate']:.2%} -> {step['error_rate']:.2%}")
@@ -0,0 +1,70 @@
+import socket
+import threading
+
+LISTEN_BACKLOG = socket.SOMAXCONN
+MAX_CONNECTIONS = 1024
+MAX_CONNECTIONS_PER_IP = 64
+
+
+class ConnectionLimiter:
+    """Admission control for accepted connections.
+
+    admit(ip) reserves a slot before any thread, coroutine or parser is
+    set up for the connection and returns False when the server-wide or
+    per-client limit is reached, so the connection can be refused with a
+    prebuilt response. A limit of 0 disables that check.
+    """
+
+    def __init__(self, max_connections=MAX_CONNECTIONS, max_per_ip=MAX_CONNECTIONS_PER_IP):
+        self.max_connections = max_connections
+        self.max_per_ip = max_per_ip
+        self._lock = threading.Lock()
+        self._active = 0
+        self._per_ip = {}
+
+        self._admitted = 0
+        self._peak = 0
+        self._rejected_total = 0
+        self._rejected_per_ip = 0
+
+    def admit(self, ip):
+        """Reserve a slot for a connection from ip, False when over a limit"""
+        with self._lock:
+            if self.max_connections and self._active >= self.max_connections:
+                self._rejected_total += 1
+                return False
+            count = self._per_ip.get(ip, 0)
+            if self.max_per_ip and count >= self.max_per_ip:
+                self._rejected_per_ip += 1
+                return False
+            self._per_ip[ip] = count + 1
+            self._active += 1
+            self._admitted += 1
+            if self._active > self._peak:
+                self._peak = self._active
+            return True
+
+    def release(self, ip):
+        """Free the slot taken by admit"""
+        with self._lock:
+            self._active -= 1
+            count = self._per_ip.get(ip, 0) - 1
+            if count > 0:
+                self._per_ip[ip] = count
+            else:
+                # Only clients with open connections are tracked
+                self._per_ip.pop(ip, None)
+
+    def stats(self):
+        """Connection counters for /stats"""
+        with self._lock:
+            return {
+                'active': self._active,
+                'peak': self._peak,
+                'clients': len(self._per_ip),
+                'max_connections': self.max_connections,
+                'max_per_ip': self.max_per_ip,
+                'admitted': self._admitted,
+                'rejected_max_connections': self._rejected_total,
+                'rejected_per_ip': self._rejected_per_ip,
+            }
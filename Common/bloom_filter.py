@@ -0,0 +1,69 @@
+import hashlib
+import math
+import threading
+
+BLOOM_CAPACITY = 100000
+BLOOM_ERROR_RATE = 0.01
+
+
+class BloomFilter:
+    """Compact set membership with false positives but no false negatives.
+
+    Sized for capacity items at error_rate: m bits in a bytearray and k
+    bit positions per item, derived from one blake2b digest by double
+    hashing. Past capacity the false-positive rate climbs; stats()
+    reports the estimate for the current fill.
+    """
+
+    def __init__(self, capacity=BLOOM_CAPACITY, error_rate=BLOOM_ERROR_RATE):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self._array = bytearray((self.bits + 7) // 8)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def add(self, item):
+        """Add item; False (and not counted) when all its bits were already set"""
+        positions = self._positions(item)
+        array = self._array
+        added = False
+        with self._lock:
+            for position in positions:
+                bit = 1 << (position & 7)
+                if not array[position >> 3] & bit:
+                    array[position >> 3] |= bit
+                    added = True
+            if added:
+                # Items added twice, e.g. on registration and again by a
+                # refresh, are counted once
+                self.count += 1
+        return added
+
+    def __contains__(self, item):
+        array = self._array
+        for position in self._positions(item):
+            if not array[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def estimated_error_rate(self):
+        return (1 - math.exp(-self.hashes * self.count / self.bits)) ** self.hashes
+
+    def stats(self):
+        return {
+            'capacity': self.capacity,
+            'items': self.count,
+            'bits': self.bits,
+            'bytes': len(self._array),
+            'hashes': self.hashes,
+            'target_error_rate': self.error_rate,
+            'estimated_error_rate': round(self.estimated_error_rate(), 6),
+        }
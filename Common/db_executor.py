@@ -0,0 +1,163 @@
+import math
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from db_pool import POOL_SIZE
+from query_stats import queries
+
+DB_WORKERS = POOL_SIZE
+DB_QUEUE_SIZE = 100
+DB_QUEUE_TIMEOUT = 2.0
+
+
+class DatabaseBusy(Exception):
+    """The DB queue is full or the call waited too long; answer 503 Retry-After"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"database busy, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+def parse_queue_size(value):
+    """--db-queue-size value: at least 1, since a queue.Queue of 0 is unbounded"""
+    queue_size = int(value)
+    if queue_size < 1:
+        raise ValueError("--db-queue-size must be at least 1")
+    return queue_size
+
+
+class DBExecutor:
+    """Fixed set of DB worker threads behind a bounded queue.
+
+    Request threads hand database calls to submit() and wait for the
+    result. When queue_size calls are already waiting the call is refused
+    at once with DatabaseBusy, and a call that sat in the queue longer
+    than queue_timeout is dropped the same way instead of running late,
+    so a slow database sheds load rather than piling up threads.
+    """
+
+    def __init__(self, workers=DB_WORKERS, queue_size=DB_QUEUE_SIZE,
+                 queue_timeout=DB_QUEUE_TIMEOUT, name="Database"):
+        if queue_size < 1:
+            raise ValueError("queue_size must be at least 1, a queue of 0 would never shed load")
+        self.workers = workers
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.retry_after = max(1, math.ceil(queue_timeout))
+        self.name = name
+        self._queue = queue.Queue(queue_size)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stopping = False
+
+        self._submitted = 0
+        self._completed = 0
+        self._rejected = 0
+        self._expired = 0
+        self._active = 0
+        self._max_depth = 0
+        self._wait_time = 0.0
+        self._max_wait = 0.0
+        self._run_time = 0.0
+
+        self._threads = [
+            threading.Thread(target=self._work, name=f"db-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, fn, *args, **kwargs):
+        """Run fn on a DB worker and return its result, or raise DatabaseBusy"""
+        if getattr(self._local, 'worker', False):
+            # Nested call from a DB method already running on a worker
+            return fn(*args, **kwargs)
+
+        if self._stopping:
+            raise DatabaseBusy(self.retry_after)
+
+        future = Future()
+        try:
+            # The caller's query context goes along so the worker's queries count for its request
+            self._queue.put_nowait((future, fn, args, kwargs, time.monotonic(), queries.current()))
+        except queue.Full:
+            with self._lock:
+                self._rejected += 1
+            raise DatabaseBusy(self.retry_after)
+
+        depth = self._queue.qsize()
+        with self._lock:
+            self._submitted += 1
+            if depth > self._max_depth:
+                self._max_depth = depth
+        return future.result()
+
+    def stats(self):
+        """Queue depth, shedding and wait time counters"""
+        with self._lock:
+            started = self._completed + self._active
+            return {
+                'name': self.name,
+                'workers': self.workers,
+                'active': self._active,
+                'queue_size': self.queue_size,
+                'queue_depth': self._queue.qsize(),
+                'max_queue_depth': self._max_depth,
+                'submitted': self._submitted,
+                'completed': self._completed,
+                'rejected': self._rejected,
+                'expired': self._expired,
+                'avg_wait_ms': round(self._wait_time / started * 1000, 3) if started else 0.0,
+                'max_wait_ms': round(self._max_wait * 1000, 3),
+                'avg_run_ms': round(self._run_time / self._completed * 1000, 3) if self._completed else 0.0,
+            }
+
+    def shutdown(self):
+        """Refuse new calls and let the workers exit once the queued ones are done"""
+        self._stopping = True
+        for _ in self._threads:
+            try:
+                self._queue.put_nowait((None, None, None, None, None, None))
+            except queue.Full:
+                # Every worker is busy; each sees _stopping and drains the queue
+                break
+
+    def _work(self):
+        self._local.worker = True
+        while True:
+            try:
+                item = self._queue.get_nowait() if self._stopping else self._queue.get()
+            except queue.Empty:
+                return
+            future, fn, args, kwargs, queued_at, context = item
+            if future is None:
+                return
+
+            waited = time.monotonic() - queued_at
+            if waited > self.queue_timeout:
+                with self._lock:
+                    self._expired += 1
+                future.set_exception(DatabaseBusy(self.retry_after))
+                continue
+
+            with self._lock:
+                self._active += 1
+                self._wait_time += waited
+                if waited > self._max_wait:
+                    self._max_wait = waited
+
+            started = time.monotonic()
+            queries.enter(context)
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                queries.enter(None)
+                with self._lock:
+                    self._active -= 1
+                    self._completed += 1
+                    self._run_time += time.monotonic() - started
+
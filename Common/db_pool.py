@@ -0,0 +1,233 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from query_stats import timed_ping
+
+POOL_SIZE = 10
+CHECKOUT_TIMEOUT = 5.0
+VALIDATE_INTERVAL = 30.0
+MAX_LIFETIME = 1800.0
+
+
+class PoolError(Exception):
+    """No connection could be checked out (timeout or connect failure)"""
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of database connections.
+
+    connect() opens a new connection, is_alive(connection) pings it and
+    reset(connection) returns it to a clean state before reuse. Checked
+    out connections are only pinged when they have not been validated
+    for validate_interval seconds, and are replaced once older than
+    max_lifetime. Checkouts are reentrant per thread: nested calls made
+    while a thread already holds a connection get the same one, so a
+    method that calls another method cannot deadlock the pool.
+    """
+
+    def __init__(self, connect, is_alive=None, reset=None, size=POOL_SIZE,
+                 checkout_timeout=CHECKOUT_TIMEOUT, validate_interval=VALIDATE_INTERVAL,
+                 max_lifetime=MAX_LIFETIME, name="Database"):
+        self._connect = connect
+        self._is_alive = is_alive
+        self._reset = reset
+        self.size = size
+        self.checkout_timeout = checkout_timeout
+        self.validate_interval = validate_interval
+        self.max_lifetime = max_lifetime
+        self.name = name
+
+        self._idle = deque()
+        self._meta = {}
+        self._open = 0
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._local = threading.local()
+
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._timeouts = 0
+        self._connect_failures = 0
+        self._validation_failures = 0
+        self._recycled = 0
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Check out a connection for the duration of a with block"""
+        held = getattr(self._local, 'held', None)
+        if held is not None:
+            self._local.depth += 1
+            try:
+                yield held
+            finally:
+                self._local.depth -= 1
+            return
+
+        connection = self.acquire(timeout)
+        self._local.held = connection
+        self._local.depth = 0
+        broken = False
+        try:
+            yield connection
+        except BaseException:
+            broken = not self._rollback(connection)
+            raise
+        finally:
+            self._local.held = None
+            self.release(connection, discard=broken)
+
+    def acquire(self, timeout=None):
+        """Take a connection out of the pool, opening one if below size"""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        waited = False
+
+        with self._available:
+            while True:
+                if self._idle:
+                    connection = self._idle.pop()
+                    self._checkouts += 1
+                    break
+                if self._open < self.size:
+                    self._open += 1
+                    self._checkouts += 1
+                    connection = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolError(f"pool exhausted, no connection within {timeout:g}s")
+                if not waited:
+                    waited = True
+                    self._waits += 1
+                    wait_started = time.monotonic()
+                self._available.wait(remaining)
+            if waited:
+                self._wait_time += time.monotonic() - wait_started
+
+        # Slow work (connect, ping) happens outside the lock
+        if connection is not None:
+            connection = self._check(connection)
+        if connection is None:
+            connection = self._open_connection()
+        return connection
+
+    def release(self, connection, discard=False):
+        """Return a connection to the pool, or drop it if broken or too old"""
+        meta = self._meta.get(id(connection))
+        expired = meta is None or time.monotonic() - meta[0] > self.max_lifetime
+        if not discard and not expired and self._reset:
+            try:
+                self._reset(connection)
+            except Exception:
+                discard = True
+
+        if discard or expired:
+            if expired and not discard:
+                self._recycled += 1
+            self._close(connection)
+            with self._available:
+                self._open -= 1
+                self._available.notify()
+            return
+
+        with self._available:
+            self._idle.append(connection)
+            self._available.notify()
+
+    def stats(self):
+        """Pool counters for health checks and metrics"""
+        with self._lock:
+            idle = len(self._idle)
+            return {
+                'name': self.name,
+                'size': self.size,
+                'open': self._open,
+                'idle': idle,
+                'in_use': self._open - idle,
+                'checkouts': self._checkouts,
+                'waits': self._waits,
+                'avg_wait_ms': round(self._wait_time / self._waits * 1000, 3) if self._waits else 0.0,
+                'timeouts': self._timeouts,
+                'connect_failures': self._connect_failures,
+                'validation_failures': self._validation_failures,
+                'recycled': self._recycled,
+            }
+
+    def close_all(self):
+        """Close every idle connection"""
+        with self._available:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+        for connection in idle:
+            self._close(connection)
+
+    def _check(self, connection):
+        """Validate a pooled connection if due, None when it must be replaced"""
+        created, validated = self._meta[id(connection)]
+        now = time.monotonic()
+        if now - created > self.max_lifetime:
+            self._recycled += 1
+            self._close(connection)
+            return None
+        if self._is_alive and now - validated > self.validate_interval:
+            try:
+                alive = self._is_alive(connection)
+            except Exception:
+                alive = False
+            if not alive:
+                self._validation_failures += 1
+                self._close(connection)
+                return None
+            self._meta[id(connection)] = (created, now)
+        return connection
+
+    def _open_connection(self):
+        try:
+            connection = self._connect()
+        except Exception as e:
+            self._connect_failures += 1
+            with self._available:
+                self._open -= 1
+                self._available.notify()
+            raise PoolError(str(e)) from e
+        now = time.monotonic()
+        self._meta[id(connection)] = (now, now)
+        return connection
+
+    def _rollback(self, connection):
+        try:
+            connection.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _close(self, connection):
+        self._meta.pop(id(connection), None)
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+def create_mysql_pool(config, name, **options):
+    """Connection pool for a mysql.connector config dict"""
+    import mysql.connector
+
+    def reset(connection):
+        # End the implicit transaction so the next borrower gets fresh reads
+        if connection.in_transaction:
+            connection.rollback()
+
+    return ConnectionPool(
+        lambda: mysql.connector.connect(**config),
+        # Pings are reported like statements so their cost shows next to the queries they guard
+        is_alive=timed_ping('mysql', lambda connection: connection.is_connected()),
+        reset=reset,
+        name=name,
+        **options
+    )
@@ -0,0 +1,154 @@
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+
+LOG_LEVELS = {'debug': 10, 'info': 20, 'warning': 30, 'error': 40}
+LOG_LEVEL = 'info'
+LOG_SAMPLE_RATE = 1.0
+LOG_QUEUE_SIZE = 10000
+LOG_BATCH_SIZE = 256
+
+
+class EventLogger:
+    """Structured JSON-lines log written by a background thread.
+
+    Callers only build a tuple and put it on a bounded queue; JSON
+    encoding and the write to the stream happen on the writer thread, a
+    batch of lines per write and flush. When the queue is full the event
+    is dropped and counted rather than blocking the request.
+
+    Events below level are discarded at the call site, as are events for
+    routes in disabled_routes. Events logged with sampled=True, the
+    frequent successes, are kept with probability sample_rate.
+    """
+
+    def __init__(self, stream=None, level=LOG_LEVEL, sample_rate=LOG_SAMPLE_RATE,
+                 disabled_routes=(), queue_size=LOG_QUEUE_SIZE, service=None):
+        self.stream = stream or sys.stdout
+        self.queue_size = queue_size
+        self.configure(level, sample_rate, disabled_routes, service)
+        self._queue = queue.Queue(queue_size)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._thread_pid = None
+
+        self.logged = 0
+        self.sampled_out = 0
+        self.dropped = 0
+        self.written = 0
+
+    def configure(self, level=LOG_LEVEL, sample_rate=LOG_SAMPLE_RATE, disabled_routes=(), service=None,
+                  path=None):
+        """Change filtering at runtime; path appends to a file instead of the current stream"""
+        if level not in LOG_LEVELS:
+            raise ValueError(f"Unknown log level '{level}', choose from: {', '.join(LOG_LEVELS)}")
+        self.level = level
+        self.threshold = LOG_LEVELS[level]
+        self.sample_rate = sample_rate
+        self.disabled_routes = frozenset(disabled_routes)
+        self.service = service
+        if path:
+            self.stream = open(path, 'a', encoding='utf-8')
+
+    def log(self, level, event, route=None, sampled=False, **fields):
+        """Queue one event; never blocks and never raises"""
+        if LOG_LEVELS[level] < self.threshold or (route is not None and route in self.disabled_routes):
+            return
+        if sampled and self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            self.sampled_out += 1
+            return
+        if self._thread_pid != os.getpid():
+            self._start()
+        try:
+            self._queue.put_nowait((time.time(), level, event, route, fields))
+            self.logged += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def debug(self, event, **fields):
+        self.log('debug', event, **fields)
+
+    def info(self, event, **fields):
+        self.log('info', event, **fields)
+
+    def warning(self, event, **fields):
+        self.log('warning', event, **fields)
+
+    def error(self, event, **fields):
+        self.log('error', event, **fields)
+
+    def _start(self):
+        # Started per process, so pre-forked workers each get their own writer
+        with self._lock:
+            if self._thread_pid != os.getpid():
+                self._queue = queue.Queue(self.queue_size)
+                self._thread = threading.Thread(target=self._write_loop, name="event-log", daemon=True)
+                self._thread.start()
+                self._thread_pid = os.getpid()
+
+    def _write_loop(self):
+        log_queue = self._queue
+        while True:
+            records = [log_queue.get()]
+            while len(records) < LOG_BATCH_SIZE:
+                try:
+                    records.append(log_queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = None in records
+            lines = [self._format(record) for record in records if record is not None]
+            try:
+                self.stream.write(''.join(lines))
+                self.stream.flush()
+                self.written += len(lines)
+            except (OSError, ValueError):
+                self.dropped += len(lines)
+            if stopping:
+                return
+
+    def _format(self, record):
+        timestamp, level, event, route, fields = record
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(timestamp)) + f".{int(timestamp % 1 * 1000):03d}Z",
+            'level': level,
+            'service': self.service,
+            'event': event,
+        }
+        if route is not None:
+            entry['route'] = route
+        entry.update(fields)
+        return json.dumps(entry, default=str, ensure_ascii=False) + '\n'
+
+    def flush(self, timeout=5.0):
+        """Write everything queued so far and stop the writer thread"""
+        if self._thread is not None and self._thread_pid == os.getpid():
+            try:
+                self._queue.put(None, timeout=timeout)
+            except queue.Full:
+                return
+            self._thread.join(timeout)
+            self._thread_pid = None
+
+    def stats(self):
+        return {
+            'level': self.level,
+            'sample_rate': self.sample_rate,
+            'disabled_routes': sorted(self.disabled_routes),
+            'logged': self.logged,
+            'sampled_out': self.sampled_out,
+            'dropped': self.dropped,
+            'written': self.written,
+            'queued': self._queue.qsize(),
+        }
+
+
+log = EventLogger()
+
+
+def parse_routes(value):
+    """'/api/health,/api/check-email' -> ('/api/health', '/api/check-email')"""
+    return tuple(route.strip() for route in value.split(',') if route.strip()) if value else ()
@@ -0,0 +1,162 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+GROUP_COMMIT_WINDOW = 0.005
+GROUP_COMMIT_MAX_ROWS = 64
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class GroupCommitter:
+    """Commits concurrent single-row writes together in one transaction.
+
+    submit(params) queues a row for statement and blocks until the batch
+    holding it has committed, returning that row's own affected count. A
+    batch is sent once the first row has waited window seconds or
+    max_rows rows are queued, whichever comes first, so a burst costs one
+    transaction (and one fsync) per batch instead of one per row. Rows run
+    in arrival order, each behind a savepoint: a row that breaks a unique
+    key is rolled back alone and its caller gets a count of 0, a row that
+    fails any other way is rolled back alone and its caller gets the
+    error. If the batch itself fails, every caller in it gets the
+    exception.
+
+    Batches are written through run(fn, *args), so they share the DB
+    executor's queue with every other database call. After stop(), rows
+    are no longer batched but written one transaction each.
+    """
+
+    def __init__(self, backend, statement, window=GROUP_COMMIT_WINDOW, max_rows=GROUP_COMMIT_MAX_ROWS,
+                 run=None, name="Group commit"):
+        self.backend = backend
+        self.statement = statement
+        self.window = window
+        self.max_rows = max_rows
+        self.run = run or (lambda fn, *args: fn(*args))
+        self.name = name
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopped = False
+
+        self._batches = 0
+        self._rows = 0
+        self._max_batch = 0
+        self._histogram = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+        self._failed_batches = 0
+        self._commit_time = 0.0
+        self._row_wait_time = 0.0
+
+    def submit(self, params):
+        """Queue one row and return its affected row count once committed"""
+        future = Future()
+        with self._lock:
+            stopped = self._stopped
+            if not stopped:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name="group-commit", daemon=True)
+                    self._thread.start()
+                self._queue.put((params, future, time.monotonic()))
+        if stopped:
+            # Nothing reads the queue any more; a late row is written on its own
+            count = self.run(self._write, [params])[0]
+            if isinstance(count, Exception):
+                raise count
+            return count
+        return future.result()
+
+    def stop(self):
+        """Commit whatever is queued, then end the batching thread"""
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            thread = self._thread
+            if thread is not None:
+                self._queue.put(None)
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def _loop(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_rows:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit(batch)
+
+    def _commit(self, batch):
+        started = time.monotonic()
+        try:
+            counts = self.run(self._write, [params for params, _, _ in batch])
+        except BaseException as e:
+            with self._lock:
+                self._failed_batches += 1
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        finished = time.monotonic()
+        with self._lock:
+            self._batches += 1
+            self._rows += len(batch)
+            self._max_batch = max(self._max_batch, len(batch))
+            self._histogram[self._bucket(len(batch))] += 1
+            self._commit_time += finished - started
+            self._row_wait_time += sum(finished - queued for _, _, queued in batch)
+        for (_, future, _), count in zip(batch, counts):
+            if isinstance(count, Exception):
+                future.set_exception(count)
+            else:
+                future.set_result(count)
+
+    def _write(self, rows):
+        counts = []
+        with self.backend.transaction() as tx:
+            for params in rows:
+                tx.savepoint()
+                try:
+                    count = tx.execute(self.statement, params)
+                except self.backend.Error as e:
+                    # Failing to roll back raises out and fails the whole batch
+                    tx.rollback_to_savepoint()
+                    duplicate = isinstance(e, self.backend.IntegrityError) and self.backend.is_duplicate(e)
+                    count = 0 if duplicate else e
+                counts.append(count)
+        return counts
+
+    def _bucket(self, size):
+        for index, bound in enumerate(BATCH_SIZE_BUCKETS):
+            if size <= bound:
+                return index
+        return len(BATCH_SIZE_BUCKETS)
+
+    def stats(self):
+        with self._lock:
+            labels = [f"<={bound}" for bound in BATCH_SIZE_BUCKETS] + [f">{BATCH_SIZE_BUCKETS[-1]}"]
+            return {
+                'window_ms': round(self.window * 1000, 3),
+                'max_rows': self.max_rows,
+                'batches': self._batches,
+                'rows': self._rows,
+                'avg_batch': round(self._rows / self._batches, 2) if self._batches else 0.0,
+                'max_batch': self._max_batch,
+                'batch_sizes': dict(zip(labels, self._histogram)),
+                'failed_batches': self._failed_batches,
+                'avg_commit_ms': round(self._commit_time / self._batches * 1000, 3) if self._batches else 0.0,
+                'avg_row_wait_ms': round(self._row_wait_time / self._rows * 1000, 3) if self._rows else 0.0,
+                'queued': self._queue.qsize(),
+            }
@@ -0,0 +1,166 @@
+MAX_HEADER_SIZE = 8 * 1024
+MAX_BODY_SIZE = 64 * 1024
+
+class RequestError(Exception):
+    """Malformed or oversized request, answered with status_code and closed"""
+
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+class RequestParser:
+    """Incremental HTTP/1.1 request parser for one connection.
+
+    Bytes received from the socket are fed in as they arrive; next_request
+    returns each complete request in order (pipelining) or None while more
+    data is needed. The header terminator is located without rescanning
+    bytes already searched, only the framing headers are extracted up
+    front, and the body is decoded exactly once from the receive buffer.
+    """
+
+    def __init__(self, max_header_size=MAX_HEADER_SIZE, max_body_size=MAX_BODY_SIZE, client=None):
+        self.max_header_size = max_header_size
+        self.max_body_size = max_body_size
+        self.client = client
+        self.buffer = bytearray()
+        self._scan_from = 0
+        self._pending = None
+
+    def feed(self, data):
+        """Append received bytes"""
+        self.buffer += data
+
+    def has_partial_request(self):
+        """True when bytes of an unfinished request are buffered"""
+        return len(self.buffer) > 0
+
+    def next_request(self):
+        """Return the next complete request dict, or None if incomplete"""
+        buffer = self.buffer
+
+        if self._pending is None:
+            header_end = buffer.find(b"\r\n\r\n", self._scan_from)
+            if header_end == -1:
+                if len(buffer) > self.max_header_size:
+                    raise RequestError(431, "Request Header Fields Too Large")
+                # The terminator may straddle the next chunk
+                self._scan_from = max(len(buffer) - 3, 0)
+                return None
+            if header_end > self.max_header_size:
+                raise RequestError(431, "Request Header Fields Too Large")
+            self._pending = self._parse_head(header_end)
+
+        request, body_start, content_length = self._pending
+        request_end = body_start + content_length
+        if len(buffer) < request_end:
+            return None
+
+        if content_length:
+            request['body'] = buffer[body_start:request_end].decode('utf-8', 'ignore')
+        del buffer[:request_end]
+        self._scan_from = 0
+        self._pending = None
+        return request
+
+    def _parse_head(self, header_end):
+        head = self.buffer[:header_end]
+        line_end = head.find(b"\r\n")
+        if line_end == -1:
+            line_end = header_end
+
+        parts = head[:line_end].decode('latin-1').split(' ')
+        if len(parts) != 3:
+            raise RequestError(400, "Bad Request")
+        method, path, version = parts
+
+        # Only the framing headers are needed per request; everything else
+        # is parsed on demand by Headers
+        lowered = head.lower()
+        if lowered.find(b"\r\ntransfer-encoding:") != -1:
+            raise RequestError(501, "Transfer-Encoding is not supported")
+
+        content_length = 0
+        start = lowered.find(b"\r\ncontent-length:")
+        if start != -1:
+            start += 17
+            end = lowered.find(b"\r\n", start)
+            try:
+                content_length = int(lowered[start:end] if end != -1 else lowered[start:])
+            except ValueError:
+                raise RequestError(400, "Invalid Content-Length")
+            if content_length < 0:
+                raise RequestError(400, "Invalid Content-Length")
+            if content_length > self.max_body_size:
+                raise RequestError(413, "Payload Too Large")
+
+        start = lowered.find(b"\r\nconnection:")
+        if start == -1:
+            keep_alive = version == 'HTTP/1.1'
+        else:
+            end = lowered.find(b"\r\n", start + 13)
+            connection = lowered[start + 13:end] if end != -1 else lowered[start + 13:]
+            if version == 'HTTP/1.1':
+                keep_alive = b"close" not in connection
+            else:
+                keep_alive = b"keep-alive" in connection
+
+        request = {
+            'method': method,
+            'path': path,
+            'version': version,
+            'headers': Headers(head, line_end + 2),
+            'body': None,
+            'keep_alive': keep_alive,
+            'client': self.client
+        }
+        return request, header_end + 4, content_length
+
+
+class Headers:
+    """Case-insensitive view of a request's header block, parsed on first use"""
+    __slots__ = ('_head', '_start', '_fields')
+
+    def __init__(self, head, start):
+        self._head = head
+        self._start = start
+        self._fields = None
+
+    def _parse(self):
+        fields = {}
+        for line in self._head[self._start:].decode('latin-1').split('\r\n'):
+            name, sep, value = line.partition(':')
+            if sep:
+                fields[name.strip().lower()] = value.strip()
+        self._fields = fields
+        return fields
+
+    def get(self, name, default=None):
+        fields = self._fields if self._fields is not None else self._parse()
+        return fields.get(name.lower(), default)
+
+    def __getitem__(self, name):
+        value = self.get(name)
+        if value is None:
+            raise KeyError(name)
+        return value
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def items(self):
+        fields = self._fields if self._fields is not None else self._parse()
+        return fields.items()
+
+
+def parse_request(request_data):
+    """Parse one complete raw request (bytes or str), None if malformed"""
+    if isinstance(request_data, str):
+        request_data = request_data.encode('utf-8')
+    parser = RequestParser(max_body_size=len(request_data))
+    parser.feed(request_data)
+    try:
+        return parser.next_request()
+    except RequestError:
+        return None
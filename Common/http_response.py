@@ -0,0 +1,168 @@
+import json
+
+STATUS_REASONS = {
+    200: "OK",
+    201: "Created",
+    202: "Accepted",
+    204: "No Content",
+    400: "Bad Request",
+    401: "Unauthorized",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    429: "Too Many Requests",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+    501: "Not Implemented",
+    503: "Service Unavailable",
+}
+
+CORS_HEADERS = (
+    b"Access-Control-Allow-Origin: *\r\n"
+    b"Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n"
+    b"Access-Control-Allow-Headers: Content-Type, Authorization\r\n"
+)
+
+CONNECTION_CLOSE = b"Connection: close\r\n"
+CONNECTION_KEEP_ALIVE = b"Connection: keep-alive\r\n"
+
+_json_templates = {}
+
+
+def json_template(status_code):
+    """Status line and constant headers for a JSON response, up to Content-Length"""
+    template = _json_templates.get(status_code)
+    if template is None:
+        reason = STATUS_REASONS.get(status_code, "Error")
+        template = (
+            f"HTTP/1.1 {status_code} {reason}\r\n".encode('ascii')
+            + b"Content-Type: application/json\r\n"
+            + CORS_HEADERS
+            + b"Content-Length: "
+        )
+        _json_templates[status_code] = template
+    return template
+
+
+for _status_code in STATUS_REASONS:
+    json_template(_status_code)
+
+
+def json_response(status_code, data):
+    """Create JSON response bytes"""
+    body = json.dumps(data).encode('utf-8')
+    return b"".join((json_template(status_code), str(len(body)).encode('ascii'), b"\r\n\r\n", body))
+
+
+def text_response(status_code, text, content_type="text/plain; charset=utf-8"):
+    """Create plain text response bytes"""
+    body = text.encode('utf-8')
+    reason = STATUS_REASONS.get(status_code, "Error")
+    return b"".join((
+        f"HTTP/1.1 {status_code} {reason}\r\nContent-Type: {content_type}\r\n".encode('ascii'),
+        b"Content-Length: ", str(len(body)).encode('ascii'), b"\r\n\r\n", body
+    ))
+
+
+def response_status(response):
+    """Status code of complete response bytes"""
+    return int(response[9:12])
+
+
+def error_response(status_code, message):
+    """Create error response bytes"""
+    return json_response(status_code, {
+        "success": False,
+        "error": message,
+        "status_code": status_code
+    })
+
+
+PREFLIGHT_RESPONSE = (
+    b"HTTP/1.1 204 No Content\r\n"
+    + CORS_HEADERS
+    + b"Content-Length: 0\r\n"
+    + b"\r\n"
+)
+
+_HEALTH_RESPONSES = {
+    connected: json_response(200, {
+        "success": True,
+        "status": "healthy",
+        "database": "connected" if connected else "disconnected"
+    })
+    for connected in (True, False)
+}
+
+
+def health_response(db_connected):
+    """Prebuilt health check response"""
+    return _HEALTH_RESPONSES[bool(db_connected)]
+
+
+_retry_responses = {}
+
+
+def retry_response(status_code, message, retry_after):
+    """Error response carrying Retry-After, cached per status and delay"""
+    key = (status_code, retry_after)
+    response = _retry_responses.get(key)
+    if response is None:
+        body = json.dumps({
+            "success": False,
+            "error": message,
+            "status_code": status_code
+        }).encode('utf-8')
+        response = b"".join((
+            json_template(status_code).replace(b"Content-Length: ", f"Retry-After: {retry_after}\r\nContent-Length: ".encode('ascii')),
+            str(len(body)).encode('ascii'), b"\r\n\r\n", body
+        ))
+        _retry_responses[key] = response
+    return response
+
+
+def busy_response(retry_after):
+    """503 asking the client to retry after retry_after seconds"""
+    return retry_response(503, "Server busy, please retry", retry_after)
+
+
+def throttled_response(retry_after):
+    """429 for a client over its attempt rate"""
+    return retry_response(429, "Too many attempts, please retry later", retry_after)
+
+
+def response_parts(response, close, keep_alive=False):
+    """Buffers to write for response, adding a Connection header without copying the body.
+
+    close adds Connection: close. keep_alive adds Connection: keep-alive,
+    which HTTP/1.0 clients need to see before they reuse the connection.
+    """
+    if close:
+        header = CONNECTION_CLOSE
+    elif keep_alive:
+        header = CONNECTION_KEEP_ALIVE
+    else:
+        return [response]
+    header_end = response.find(b"\r\n\r\n") + 2
+    view = memoryview(response)
+    return [view[:header_end], header, view[header_end:]]
+
+
+# Sent to connections refused by admission control, before reading a byte
+REJECT_RESPONSE = b"".join(response_parts(busy_response(1), True))
+
+
+def send_response(client_socket, response, close, keep_alive=False):
+    """Write response to a blocking socket, gathering the parts with sendmsg where available"""
+    if not close and not keep_alive:
+        client_socket.sendall(response)
+        return
+    parts = response_parts(response, close, keep_alive)
+    if not hasattr(client_socket, 'sendmsg'):
+        client_socket.sendall(b"".join(parts))
+        return
+    sent = client_socket.sendmsg(parts)
+    total = sum(len(part) for part in parts)
+    if sent < total:
+        client_socket.sendall(b"".join(parts)[sent:])
@@ -0,0 +1,181 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+DB_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+TABLE_SIZE_TTL = 15.0
+HTTP_METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+
+
+class Histogram:
+    """Fixed-bucket histogram keyed by a tuple of label values.
+
+    Every thread records into its own shard, so observe() takes no lock
+    and never contends with other request threads or with a scrape.
+    collect() sums the shards; shards of threads that have exited are
+    folded into one retired shard so thread-per-connection serving does
+    not grow the set without bound.
+    """
+
+    def __init__(self, name, help, label_names, buckets):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self.buckets = buckets
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = {}
+        self._retired = {}
+
+    def observe(self, labels, value):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._new_shard()
+        entry = shard.get(labels)
+        if entry is None:
+            # One count per bucket, one for +Inf, then the sum
+            entry = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        entry[bisect_left(self.buckets, value)] += 1
+        entry[-1] += value
+
+    def _new_shard(self):
+        shard = self._local.shard = {}
+        with self._lock:
+            self._shards[threading.current_thread()] = shard
+        return shard
+
+    def collect(self):
+        """{labels: (bucket counts incl. +Inf, sum)} summed over every thread"""
+        with self._lock:
+            for thread in [thread for thread in self._shards if not thread.is_alive()]:
+                self._merge(self._retired, self._shards.pop(thread))
+            totals = {}
+            self._merge(totals, self._retired)
+            for shard in list(self._shards.values()):
+                self._merge(totals, shard)
+        return totals
+
+    def _merge(self, into, shard):
+        for labels, entry in list(shard.items()):
+            total = into.get(labels)
+            if total is None:
+                into[labels] = list(entry)
+            else:
+                for index, value in enumerate(entry):
+                    total[index] += value
+
+    def render(self, lines):
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} histogram")
+        for labels, entry in sorted(self.collect().items()):
+            label_text = format_labels(self.label_names, labels)
+            prefix = label_text[:-1] + ',' if label_text else '{'
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), entry[:-1]):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{label_text} {entry[-1]:.6f}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+
+
+REQUEST_SECONDS = Histogram(
+    'shiftxpress_http_request_duration_seconds',
+    "Time from a parsed request to its response bytes, by route, method and status",
+    ('route', 'method', 'status'), REQUEST_BUCKETS
+)
+DB_QUERY_SECONDS = Histogram(
+    'shiftxpress_db_query_duration_seconds',
+    "Time spent running one named statement, including fetching its rows",
+    ('backend', 'statement'), DB_BUCKETS
+)
+
+
+def format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{escape(value)}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def observe_request(request, status, seconds, routes):
+    """Record one served request.
+
+    Only paths in routes and standard methods become label values, the
+    rest share 'unmatched' and 'other', so clients cannot add series.
+    """
+    route = request['path'] if request['path'] in routes else 'unmatched'
+    method = request['method'] if request['method'] in HTTP_METHODS else 'other'
+    REQUEST_SECONDS.observe((route, method, status), seconds)
+
+
+def sample(name, kind, help, value, label_names=()):
+    """One metric for render(); value is a number, None (omitted) or {label values: number}"""
+    return name, kind, help, value, label_names
+
+
+def process_samples():
+    """This process's CPU time, memory, descriptors and threads"""
+    times = os.times()
+    samples = [
+        sample('process_cpu_seconds_total', 'counter', "User and system CPU time", times.user + times.system),
+        sample('shiftxpress_threads', 'gauge', "Live Python threads", threading.active_count()),
+    ]
+    try:
+        with open('/proc/self/statm') as f:
+            rss_pages = int(f.read().split()[1])
+        samples.append(sample('process_resident_memory_bytes', 'gauge', "Resident memory",
+                              rss_pages * os.sysconf('SC_PAGE_SIZE')))
+        samples.append(sample('process_open_fds', 'gauge', "Open file descriptors",
+                              len(os.listdir('/proc/self/fd'))))
+    except (OSError, ValueError, AttributeError):
+        pass
+    return samples
+
+
+class TableSizes:
+    """Row counts that cost a query, refreshed at most every ttl seconds per scrape"""
+
+    def __init__(self, fetch, ttl=TABLE_SIZE_TTL):
+        self.fetch = fetch
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._value = None
+        self._fetched_at = 0.0
+
+    def get(self):
+        with self._lock:
+            if self._value is None or time.monotonic() - self._fetched_at > self.ttl:
+                try:
+                    self._value = self.fetch()
+                except Exception:
+                    # Keep serving the last counts while the database is unavailable or busy
+                    pass
+                self._fetched_at = time.monotonic()
+            return self._value
+
+
+def render(samples, histograms=(REQUEST_SECONDS, DB_QUERY_SECONDS)):
+    """Prometheus text exposition format of samples and histograms"""
+    lines = []
+    # Request counts come from the latency histogram instead of a second counter on the hot path
+    counts = {labels: sum(entry[:-1]) for labels, entry in REQUEST_SECONDS.collect().items()}
+    samples = [sample('shiftxpress_http_requests_total', 'counter', "Requests served, by route, method and status",
+                      counts, REQUEST_SECONDS.label_names)] + list(samples)
+
+    for name, kind, help, value, label_names in samples:
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} {kind}")
+        if isinstance(value, dict):
+            for labels, labelled_value in sorted(value.items()):
+                lines.append(f"{name}{format_labels(label_names, labels)} {labelled_value}")
+        elif value is not None:
+            lines.append(f"{name} {value}")
+    for histogram in histograms:
+        histogram.render(lines)
+    return '\n'.join(lines) + '\n'
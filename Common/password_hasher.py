@@ -0,0 +1,199 @@
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from request_timing import timing
+
+ALGORITHMS = ('scrypt', 'pbkdf2_sha256')
+HASH_TARGET_MS = 50.0
+SALT_BYTES = 16
+
+SCRYPT_R = 8
+SCRYPT_P = 1
+SCRYPT_MIN_LOG2_N = 10
+SCRYPT_MAX_LOG2_N = 20
+PBKDF2_MIN_ITERATIONS = 100000
+PARENT_CHECK_INTERVAL = 1.0
+
+
+def _b64(data):
+    return base64.b64encode(data).decode('ascii').rstrip('=')
+
+
+def _unb64(text):
+    return base64.b64decode(text + '=' * (-len(text) % 4))
+
+
+def is_password_hash(stored):
+    """True if stored is in a format verify understands, versioned or legacy"""
+    parts = stored.split('$')
+    if len(parts) == 1:
+        return len(stored) == 64 and all(c in '0123456789abcdefABCDEF' for c in stored)
+    return (parts[0] == 'scrypt' and len(parts) == 6) or (parts[0] == 'pbkdf2_sha256' and len(parts) == 4)
+
+
+def _scrypt(password, salt, log2_n, r, p):
+    n = 1 << log2_n
+    return hashlib.scrypt(password, salt=salt, n=n, r=r, p=p, maxmem=256 * r * n, dklen=32)
+
+
+def _pbkdf2(password, salt, iterations):
+    return hashlib.pbkdf2_hmac('sha256', password, salt, iterations)
+
+
+def _init_hashing_process(parent_pid, cores):
+    if cores:
+        # Pinned workers pass the cores the pool may use instead of their own one
+        os.sched_setaffinity(0, cores)
+    threading.Thread(target=_exit_with_parent, args=(parent_pid,), name="parent-watch", daemon=True).start()
+
+
+def _exit_with_parent(parent_pid):
+    # A killed server cannot shut its pool down; don't outlive it
+    while os.getppid() == parent_pid:
+        time.sleep(PARENT_CHECK_INTERVAL)
+    os._exit(0)
+
+
+class PasswordHasher:
+    """Salted, versioned password hashing with the KDF off the request threads.
+
+    Stored hashes name their algorithm and cost:
+        scrypt$<log2 n>$<r>$<p>$<salt>$<hash>
+        pbkdf2_sha256$<iterations>$<salt>$<hash>
+    Anything else of 64 hex digits is a legacy unsalted SHA-256 hash; it
+    still verifies but is reported as needing a rehash, as is a hash made
+    with another algorithm or cost than the current one.
+
+    KDF calls run in a process pool (created on first use, so pre-forked
+    workers each get their own) and release the GIL for request threads.
+    The pool's processes are spawned rather than forked: a fork of a
+    serving process would inherit its listening and client sockets and
+    keep them open, even after the server exits.
+    cost is log2(n) for scrypt and the iteration count for PBKDF2; 0
+    calibrates it at startup so one hash takes about target_ms.
+    processes=0 hashes on the calling thread. cores, when given, are the
+    CPUs the pool's processes run on, whatever the caller's affinity.
+    """
+
+    def __init__(self, algorithm='scrypt', cost=0, target_ms=HASH_TARGET_MS, processes=None, cores=None):
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown hash algorithm '{algorithm}', choose from: {', '.join(ALGORITHMS)}")
+        self.algorithm = algorithm
+        self.target_ms = target_ms
+        self.processes = (os.cpu_count() or 1) if processes is None else processes
+        self.cores = cores
+        self._executor = None
+        self._executor_pid = None
+        self.cost = cost or self.calibrate()
+        self.hash_ms = self._measure(self.cost)
+
+    def calibrate(self):
+        """Cheapest cost whose hash takes at least target_ms on this machine"""
+        if self.algorithm == 'scrypt':
+            log2_n = SCRYPT_MIN_LOG2_N
+            while log2_n < SCRYPT_MAX_LOG2_N and self._measure(log2_n) < self.target_ms:
+                log2_n += 1
+            return log2_n
+
+        # PBKDF2 time is linear in the iteration count
+        sample = 20000
+        per_iteration = self._measure(sample) / sample
+        iterations = int(self.target_ms / per_iteration) // 1000 * 1000
+        return max(iterations, PBKDF2_MIN_ITERATIONS)
+
+    def _measure(self, cost):
+        salt = secrets.token_bytes(SALT_BYTES)
+        started = time.perf_counter()
+        self._derive(b"calibration password", salt, self._params(cost))
+        return (time.perf_counter() - started) * 1000
+
+    def _params(self, cost):
+        if self.algorithm == 'scrypt':
+            return (cost, SCRYPT_R, SCRYPT_P)
+        return (cost,)
+
+    def _derive(self, password, salt, params, algorithm=None):
+        if (algorithm or self.algorithm) == 'scrypt':
+            return _scrypt(password, salt, *params)
+        return _pbkdf2(password, salt, *params)
+
+    def _pool(self):
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ProcessPoolExecutor(max_workers=self.processes,
+                                                 mp_context=multiprocessing.get_context('spawn'),
+                                                 initializer=_init_hashing_process, initargs=(os.getpid(), self.cores))
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    def _run(self, password, salt, params, algorithm):
+        """Derive a key in the process pool, or inline when processes is 0"""
+        with timing.phase('hash'):
+            if not self.processes:
+                return self._derive(password, salt, params, algorithm)
+            fn = _scrypt if algorithm == 'scrypt' else _pbkdf2
+            return self._pool().submit(fn, password, salt, *params).result()
+
+    def _encode(self, params, salt, key):
+        return '$'.join([self.algorithm] + [str(p) for p in params] + [_b64(salt), _b64(key)])
+
+    def hash(self, password):
+        """Encoded hash of password with the current algorithm and cost"""
+        salt = secrets.token_bytes(SALT_BYTES)
+        params = self._params(self.cost)
+        return self._encode(params, salt, self._run(password.encode(), salt, params, self.algorithm))
+
+    def hash_many(self, passwords):
+        """Hashes of a batch of passwords, spread over every hashing process"""
+        params = self._params(self.cost)
+        salts = [secrets.token_bytes(SALT_BYTES) for _ in passwords]
+        encoded = [password.encode() for password in passwords]
+        if not self.processes:
+            keys = [self._derive(password, salt, params) for password, salt in zip(encoded, salts)]
+        else:
+            fn = _scrypt if self.algorithm == 'scrypt' else _pbkdf2
+            columns = [[param] * len(passwords) for param in params]
+            chunksize = max(1, len(passwords) // (self.processes * 4))
+            keys = list(self._pool().map(fn, encoded, salts, *columns, chunksize=chunksize))
+        return [self._encode(params, salt, key) for salt, key in zip(salts, keys)]
+
+    def verify(self, password, stored):
+        """(matches, needs_rehash) for password against a stored hash"""
+        parts = stored.split('$')
+        algorithm = parts[0]
+
+        if len(parts) == 1 and len(stored) == 64:
+            legacy = hashlib.sha256(password.encode()).hexdigest()
+            return hmac.compare_digest(legacy, stored), True
+
+        try:
+            if algorithm == 'scrypt' and len(parts) == 6:
+                params = tuple(int(p) for p in parts[1:4])
+            elif algorithm == 'pbkdf2_sha256' and len(parts) == 4:
+                params = (int(parts[1]),)
+            else:
+                return False, False
+            salt, expected = _unb64(parts[-2]), _unb64(parts[-1])
+        except ValueError:
+            return False, False
+
+        key = self._run(password.encode(), salt, params, algorithm)
+        if not hmac.compare_digest(key, expected):
+            return False, False
+        return True, algorithm != self.algorithm or params != self._params(self.cost)
+
+    def describe(self):
+        """One-line summary for the startup banner"""
+        return (f"{self.algorithm} cost {self.cost} (~{self.hash_ms:.0f}ms per hash, "
+                f"{self.processes or 'no'} hashing processes)")
+
+    def shutdown(self):
+        if self._executor is not None and self._executor_pid == os.getpid():
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
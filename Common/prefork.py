@@ -0,0 +1,172 @@
+import os
+import signal
+import socket
+import sys
+import time
+
+from event_log import log
+
+
+def available_cores():
+    """CPUs this process may run on (respects taskset/cgroup affinity)"""
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        return list(range(os.cpu_count() or 1))
+
+
+def parse_workers(value):
+    """--workers value: a positive count or 'auto' for one per available core"""
+    if value == 'auto':
+        return len(available_cores())
+    workers = int(value)
+    if workers < 1:
+        raise ValueError("--workers must be at least 1")
+    return workers
+
+
+class Supervisor:
+    """Pre-fork worker processes that share the server's listening ports.
+
+    Every worker builds its own server (and therefore its own handler and
+    database connections) after the fork. With SO_REUSEPORT each worker
+    binds the port itself and the kernel spreads new connections across
+    them; elsewhere the supervisor binds once and the workers inherit the
+    sockets. Workers that die are restarted; if they keep dying right
+    after start (e.g. the port cannot be bound) the supervisor gives up.
+    """
+    crash_window = 1.0
+    max_fast_crashes = 5
+
+    def __init__(self, server_class, options, workers, pin_cpus=False):
+        self.server_class = server_class
+        self.options = options
+        self.workers = workers
+        self.pin_cpus = pin_cpus
+        self.reuse_port = hasattr(socket, 'SO_REUSEPORT')
+        self.inherited_sockets = None
+        self.children = {}
+        self.running = False
+        self.fast_crashes = 0
+
+    def run(self):
+        """Start the workers and supervise them until interrupted"""
+        name = self.server_class.name
+        mode = "SO_REUSEPORT" if self.reuse_port else "inherited socket"
+        print(f"👥 {name} supervisor (pid {os.getpid()}) starting {self.workers} workers ({mode})")
+
+        if not self.reuse_port:
+            self.inherited_sockets = self.bind_sockets()
+
+        self.running = True
+        signal.signal(signal.SIGTERM, self.handle_sigterm)
+        try:
+            for worker_id in range(self.workers):
+                self.spawn(worker_id)
+            self.watch()
+        except KeyboardInterrupt:
+            print(f"\n🛑 Received interrupt signal - Shutting down {name} workers...")
+        finally:
+            self.stop()
+
+    def bind_sockets(self):
+        ports = [self.options['port']] + list(self.options.get('alias_ports') or [])
+        sockets = []
+        for port in ports:
+            listen_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            listen_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            listen_socket.bind((self.options['host'], port))
+            listen_socket.listen(self.options['backlog'])
+            sockets.append(listen_socket)
+        return sockets
+
+    def spawn(self, worker_id):
+        pid = os.fork()
+        if pid:
+            self.children[pid] = (worker_id, time.monotonic())
+            return
+
+        # Worker process: never returns into the supervisor loop
+        exit_code = 1
+        try:
+            signal.signal(signal.SIGTERM, signal.default_int_handler)
+            hash_cores = None
+            if self.pin_cpus:
+                cores = available_cores()
+                os.sched_setaffinity(0, {cores[worker_id % len(cores)]})
+                # The worker's hashing pool stays spread over every core
+                hash_cores = cores
+            server = self.server_class(
+                **self.options,
+                worker_id=worker_id,
+                reuse_port=self.reuse_port,
+                listen_sockets=self.inherited_sockets,
+                hash_cores=hash_cores
+            )
+            signal.signal(signal.SIGTERM, lambda signum, frame: server.request_stop())
+            try:
+                server.start()
+            except KeyboardInterrupt:
+                server.stop()
+            exit_code = 0
+        except KeyboardInterrupt:
+            exit_code = 0
+        except Exception as e:
+            log.error('worker_failed', worker=worker_id, error=str(e))
+        finally:
+            log.flush()
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(exit_code)
+
+    def watch(self):
+        while self.running and self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            worker_id, started = self.children.pop(pid, (None, None))
+            if worker_id is None or not self.running:
+                continue
+
+            log.warning('worker_restarted', worker=worker_id, pid=pid, status=os.waitstatus_to_exitcode(status))
+            if time.monotonic() - started < self.crash_window:
+                self.fast_crashes += 1
+                if self.fast_crashes >= self.max_fast_crashes:
+                    log.error('workers_crashing', crashes=self.fast_crashes)
+                    break
+                time.sleep(self.crash_window)
+            else:
+                self.fast_crashes = 0
+            self.spawn(worker_id)
+
+    def handle_sigterm(self, signum, frame):
+        raise KeyboardInterrupt
+
+    def stop(self):
+        """Terminate every worker and wait for them to exit"""
+        self.running = False
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + 10
+        while self.children and time.monotonic() < deadline:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                self.children.pop(pid, None)
+            else:
+                time.sleep(0.05)
+        for pid in self.children:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        for listen_socket in self.inherited_sockets or []:
+            listen_socket.close()
+        print(f"✅ {self.server_class.name} workers stopped")
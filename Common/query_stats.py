@@ -0,0 +1,152 @@
+import threading
+import time
+
+from event_log import log
+from metrics import DB_QUERY_SECONDS
+
+SLOW_QUERY_MS = 100.0
+EXPLAIN_INTERVAL = 60.0
+MAX_QUERIES_PER_REQUEST = 3
+
+
+class QueryContext:
+    """Statements run on behalf of one request, on whichever threads ran them"""
+    __slots__ = ('route', 'method', 'statements', 'seconds')
+
+    def __init__(self, route, method):
+        self.route = route
+        self.method = method
+        self.statements = []
+        self.seconds = 0.0
+
+
+class QueryStats:
+    """Count, rows, errors and latency of every named statement.
+
+    Session reports each statement here after running it; the time also
+    goes to the DB_QUERY_SECONDS histogram. Statements slower than
+    slow_ms are logged as slow_query warnings with the backend's query
+    plan, explained at most once per statement every explain_interval
+    seconds so a slow database is not asked for a plan on every call.
+
+    Queries are attributed to the request being served through a
+    thread-local QueryContext, which DBExecutor hands on to the worker
+    running each call. Requests that run more than max_per_request
+    statements are logged as many_queries warnings with the statements
+    in order, which is how N+1 patterns show up.
+    """
+
+    def __init__(self, slow_ms=SLOW_QUERY_MS, max_per_request=MAX_QUERIES_PER_REQUEST,
+                 explain_interval=EXPLAIN_INTERVAL):
+        self.configure(slow_ms, max_per_request, explain_interval)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._statements = {}
+        self._explained = {}
+        self.slow = 0
+        self.busy_requests = 0
+
+    def configure(self, slow_ms=SLOW_QUERY_MS, max_per_request=MAX_QUERIES_PER_REQUEST,
+                  explain_interval=EXPLAIN_INTERVAL):
+        self.slow_ms = slow_ms
+        self.max_per_request = max_per_request
+        self.explain_interval = explain_interval
+
+    def current(self):
+        """Context of the request this thread is serving, or None"""
+        return getattr(self._local, 'context', None)
+
+    def enter(self, context):
+        """Attribute this thread's queries to context (None: to no request)"""
+        previous = getattr(self._local, 'context', None)
+        self._local.context = context
+        return previous
+
+    def begin(self, request):
+        context = QueryContext(request['path'], request['method'])
+        self._local.context = context
+        return context
+
+    def end(self, context):
+        """Stop attributing queries to context and report it if it ran too many"""
+        self._local.context = None
+        if self.max_per_request and len(context.statements) > self.max_per_request:
+            self.busy_requests += 1
+            log.warning('many_queries', route=context.route, method=context.method,
+                        queries=len(context.statements), db_ms=round(context.seconds * 1000, 3),
+                        statements=context.statements)
+
+    def record(self, backend, statement, seconds, rows, failed=False):
+        """Count one statement; True when it was slow enough to log"""
+        DB_QUERY_SECONDS.observe((backend, statement), seconds)
+        key = (backend, statement)
+        with self._lock:
+            entry = self._statements.get(key)
+            if entry is None:
+                # count, errors, rows, seconds, max seconds
+                entry = self._statements[key] = [0, 0, 0, 0.0, 0.0]
+            entry[0] += 1
+            entry[1] += failed
+            entry[2] += rows
+            entry[3] += seconds
+            if seconds > entry[4]:
+                entry[4] = seconds
+        context = getattr(self._local, 'context', None)
+        if context is not None:
+            context.statements.append(statement)
+            context.seconds += seconds
+        return bool(self.slow_ms) and seconds * 1000 >= self.slow_ms
+
+    def log_slow(self, backend, connection, statement, params, seconds, rows):
+        """Log a slow statement, with its plan unless one was logged recently"""
+        self.slow += 1
+        plan = None
+        now = time.monotonic()
+        key = (backend.name, statement)
+        with self._lock:
+            due = now - self._explained.get(key, -self.explain_interval) >= self.explain_interval
+            if due:
+                self._explained[key] = now
+        if due and statement in backend.statements:
+            try:
+                plan = backend.explain(connection, statement, params)
+            except Exception as e:
+                plan = f"EXPLAIN failed: {e}"
+        context = self.current()
+        log.warning('slow_query', backend=backend.name, statement=statement, ms=round(seconds * 1000, 3), rows=rows,
+                    route=context.route if context else None, plan=plan)
+
+    def stats(self):
+        with self._lock:
+            statements = {
+                f"{backend}.{statement}": {
+                    'count': count,
+                    'errors': errors,
+                    'rows': rows,
+                    'avg_ms': round(seconds / count * 1000, 3),
+                    'max_ms': round(max_seconds * 1000, 3),
+                    'total_ms': round(seconds * 1000, 3),
+                }
+                for (backend, statement), (count, errors, rows, seconds, max_seconds) in sorted(self._statements.items())
+            }
+        return {
+            'slow_ms': self.slow_ms,
+            'slow': self.slow,
+            'max_per_request': self.max_per_request,
+            'busy_requests': self.busy_requests,
+            'statements': statements,
+        }
+
+
+queries = QueryStats()
+
+
+def timed_ping(backend, is_alive):
+    """is_alive(connection) that reports each call as the statement 'ping'"""
+    def ping(connection):
+        started = time.perf_counter()
+        try:
+            return is_alive(connection)
+        finally:
+            queries.record(backend, 'ping', time.perf_counter() - started, 0)
+    return ping
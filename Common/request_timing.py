@@ -0,0 +1,355 @@
+import cProfile
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+
+from event_log import log
+from http_response import response_status
+
+SLOW_REQUEST_MS = 500.0
+PROFILE_REQUESTS = 100
+PROFILE_MAX_REQUESTS = 100000
+PROFILERS = ('cprofile', 'sampling')
+SAMPLE_INTERVAL = 0.005
+PROFILE_TOP = 15
+
+UNTIMED = nullcontext()
+
+
+class Phase:
+    """Adds the time spent in a with block to one phase of a request"""
+    __slots__ = ('phases', 'name', 'started')
+
+    def __init__(self, phases, name):
+        self.phases = phases
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.phases[self.name] = self.phases.get(self.name, 0.0) + time.perf_counter() - self.started
+
+
+class ConnectionTimer:
+    """Clock for the requests of one connection, driven by the engine.
+
+    A request's clock starts when its first bytes arrive, so time a
+    keep-alive connection spends idle between requests is not counted.
+    Laps are taken between the engine's calls: 'parse' for feeding and
+    parsing, 'recv' for reading the rest of a partly received request,
+    'handle' for building the response (on the event-loop engine this
+    includes waiting for a handler thread) and 'send'.
+    """
+
+    def __init__(self, timing, parser):
+        self.timing = timing
+        self.parser = parser
+        self.phases = None
+        self.started = 0.0
+        self.mark = time.perf_counter()
+
+    def _lap(self, name):
+        now = time.perf_counter()
+        self.phases[name] = self.phases.get(name, 0.0) + now - self.mark
+        self.mark = now
+
+    def parsed(self, request):
+        if self.phases is None:
+            if request is None:
+                self.mark = time.perf_counter()
+                return
+            # Pipelined request that was already buffered
+            self.phases = {}
+            self.started = self.mark
+        self._lap('parse')
+        if request is not None:
+            request['phases'] = self.phases
+
+    def received(self):
+        if self.phases is None or not self.parser.has_partial_request():
+            # Waiting for the first bytes of a request is idle time
+            self.phases = {}
+            self.started = self.mark = time.perf_counter()
+            return
+        self._lap('recv')
+
+    def handled(self):
+        self._lap('handle')
+
+    def sent(self, request, response):
+        self._lap('send')
+        self.timing.finish(request, response, self.phases, self.mark - self.started)
+        self.phases = None
+
+
+class NullTimer:
+    """Stands in for ConnectionTimer while timing is off"""
+
+    def parsed(self, request):
+        pass
+
+    def received(self):
+        pass
+
+    def handled(self):
+        pass
+
+    def sent(self, request, response):
+        pass
+
+
+NULL_TIMER = NullTimer()
+
+
+class CProfileSession:
+    """cProfile over the next requests handled.
+
+    The profiler hooks only the thread that enables it and one Profile
+    cannot be enabled on two threads at once, so requests are profiled
+    one at a time; requests arriving while another is being profiled are
+    served unprofiled and not counted.
+    """
+    kind = 'cprofile'
+    suffix = '.prof'
+
+    def __init__(self, requests, path):
+        self.requests = requests
+        self.path = path
+        self.profiled = 0
+        self.started_at = time.time()
+        self.profile = cProfile.Profile()
+        self._busy = threading.Lock()
+
+    def run(self, fn, request):
+        if not self._busy.acquire(blocking=False):
+            return fn(request), False
+        try:
+            self.profile.enable()
+            try:
+                return fn(request), True
+            finally:
+                self.profile.disable()
+        finally:
+            self.profiled += 1
+            self._busy.release()
+
+    def save(self):
+        self.profile.dump_stats(self.path)
+        stats = pstats.Stats(self.profile).stats
+        top = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:PROFILE_TOP]
+        return [f"{tottime * 1000:.1f}ms self, {cumtime * 1000:.1f}ms total, {calls} calls: "
+                f"{function} ({os.path.basename(filename)}:{line})"
+                for (filename, line, function), (_, calls, tottime, cumtime, _) in top]
+
+
+class SamplingSession:
+    """Stack samples of the threads handling the next requests.
+
+    A background thread reads sys._current_frames() every interval and
+    records the stacks of threads that are inside a request, so the
+    cost to requests is the GIL hand-off of each sample. Stacks are
+    saved in the collapsed format flame graph tools read.
+    """
+    kind = 'sampling'
+    suffix = '.folded'
+
+    def __init__(self, requests, path, interval=SAMPLE_INTERVAL):
+        self.requests = requests
+        self.path = path
+        self.interval = interval
+        self.profiled = 0
+        self.started_at = time.time()
+        self.samples = Counter()
+        self._lock = threading.Lock()
+        self._threads = set()
+        self._done = threading.Event()
+        self._sampler = threading.Thread(target=self._sample_loop, name="profile-sampler", daemon=True)
+        self._sampler.start()
+
+    def run(self, fn, request):
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._threads.add(thread_id)
+        try:
+            return fn(request), True
+        finally:
+            with self._lock:
+                self._threads.discard(thread_id)
+                self.profiled += 1
+
+    def _sample_loop(self):
+        while not self._done.wait(self.interval):
+            with self._lock:
+                threads = set(self._threads)
+            if not threads:
+                continue
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id in threads:
+                    self.samples[self._stack(frame)] += 1
+
+    def _stack(self, frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+    def save(self):
+        self._done.set()
+        self._sampler.join()
+        with open(self.path, 'w', encoding='utf-8') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        leaves = Counter()
+        for stack, count in self.samples.items():
+            leaves[stack.rpartition(';')[2]] += count
+        total = sum(leaves.values()) or 1
+        return [f"{count / total:.1%} of {total} samples: {leaf}" for leaf, count in leaves.most_common(PROFILE_TOP)]
+
+
+PROFILER_SESSIONS = {
+    CProfileSession.kind: CProfileSession,
+    SamplingSession.kind: SamplingSession,
+}
+
+
+class RequestTiming:
+    """Opt-in per-request phase timing, slow request log and profiling.
+
+    While off, engines get NULL_TIMER for new connections and phase()
+    returns a shared no-op context manager, so the cost is a few no-op
+    calls per request. When on, each request carries a dict of phase
+    durations: the engine records transport phases, handlers and the
+    password hasher add their own through phase() on the handling
+    thread. Requests slower than slow_ms are logged as slow_request
+    warnings with their phases, the rest at debug level.
+
+    A profiling session covers the next N requests of this process and
+    is saved to profile_dir when they are done or when it is stopped.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.slow_ms = SLOW_REQUEST_MS
+        self.profile_dir = tempfile.gettempdir()
+        self.hooked = False
+        self.session = None
+        self.last_profile = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        self.timed = 0
+        self.slow = 0
+
+    def configure(self, enabled=False, slow_ms=SLOW_REQUEST_MS, profile_dir=None):
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        if profile_dir:
+            self.profile_dir = profile_dir
+        self.hooked = self.enabled or self.session is not None
+
+    def connection(self, parser):
+        """Timer for a new connection read by parser"""
+        return ConnectionTimer(self, parser) if self.enabled else NULL_TIMER
+
+    def phase(self, name):
+        """Context manager adding its duration to phase name of the request being handled"""
+        if not self.enabled:
+            return UNTIMED
+        phases = getattr(self._local, 'phases', None)
+        return Phase(phases, name) if phases is not None else UNTIMED
+
+    def call(self, fn, request):
+        """fn(request) with the request's phases visible to phase() and under the profiler if one runs"""
+        self._local.phases = request.get('phases')
+        try:
+            session = self.session
+            if session is None:
+                return fn(request)
+            response, counted = session.run(fn, request)
+            if counted and session.profiled >= session.requests:
+                self.stop_profile(session)
+            return response
+        finally:
+            self._local.phases = None
+
+    def finish(self, request, response, phases, total):
+        """Log the phases of a request once its response has been sent"""
+        self.timed += 1
+        total_ms = total * 1000
+        slow = total_ms >= self.slow_ms
+        if slow:
+            self.slow += 1
+        log.log('warning' if slow else 'debug', 'slow_request' if slow else 'request_timing',
+                route=request['path'], method=request['method'], status=response_status(response),
+                client=request.get('client'), total_ms=round(total_ms, 3),
+                phases={name: round(seconds * 1000, 3) for name, seconds in phases.items()})
+
+    def start_profile(self, kind, requests):
+        """Profile the next requests with profiler kind; ValueError if one is already running"""
+        if kind not in PROFILER_SESSIONS:
+            raise ValueError(f"Unknown profiler '{kind}', choose from: {', '.join(PROFILERS)}")
+        if not 0 < requests <= PROFILE_MAX_REQUESTS:
+            raise ValueError(f"Requests to profile must be between 1 and {PROFILE_MAX_REQUESTS}")
+        with self._lock:
+            if self.session is not None:
+                raise ValueError(f"A {self.session.kind} profile is already running")
+            session_class = PROFILER_SESSIONS[kind]
+            path = os.path.join(self.profile_dir, f"shiftxpress-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}"
+                                                  f"-{kind}{session_class.suffix}")
+            self.session = session_class(requests, path)
+            self.hooked = True
+        log.info('profile_started', profiler=kind, requests=requests, path=path)
+        return self.profile_status()
+
+    def stop_profile(self, session=None):
+        """Save the running profile (only if it is session, when given); None if there was none"""
+        with self._lock:
+            if self.session is None or (session is not None and self.session is not session):
+                return None
+            session, self.session = self.session, None
+            self.hooked = self.enabled
+        try:
+            top = session.save()
+        except OSError as e:
+            log.error('profile_save_failed', profiler=session.kind, path=session.path, error=str(e))
+            top = None
+        self.last_profile = {
+            'profiler': session.kind,
+            'path': session.path if top is not None else None,
+            'requests': session.profiled,
+            'seconds': round(time.time() - session.started_at, 3),
+        }
+        log.info('profile_saved', **self.last_profile, top=top)
+        return self.last_profile
+
+    def profile_status(self):
+        session = self.session
+        running = None
+        if session is not None:
+            running = {
+                'profiler': session.kind,
+                'path': session.path,
+                'requests': session.requests,
+                'profiled': session.profiled,
+            }
+        return {'running': running, 'last': self.last_profile}
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'slow_ms': self.slow_ms,
+            'timed': self.timed,
+            'slow': self.slow,
+            'profile': self.profile_status(),
+        }
+
+
+timing = RequestTiming()
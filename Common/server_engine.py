@@ -0,0 +1,277 @@
+import asyncio
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from event_log import log
+from http_parser import RequestError
+from http_response import REJECT_RESPONSE, response_parts, send_response
+from request_timing import timing
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class ThreadedEngine:
+    """Serve every accepted connection on its own thread"""
+    name = 'threaded'
+
+    def __init__(self, server):
+        self.server = server
+
+    def serve(self, listen_sockets):
+        """Accept connections on every socket until the server stops running"""
+        for listen_socket in listen_sockets[1:]:
+            threading.Thread(target=self.accept_loop, args=(listen_socket,), daemon=True).start()
+        self.accept_loop(listen_sockets[0])
+
+    def accept_loop(self, listen_socket):
+        listen_socket.settimeout(1)
+
+        while self.server.running:
+            try:
+                client_socket, client_address = listen_socket.accept()
+                if not self.server.limiter.admit(client_address[0]):
+                    self.reject(client_socket)
+                    continue
+                log.debug('connection_opened', client=f"{client_address[0]}:{client_address[1]}")
+
+                client_thread = threading.Thread(
+                    target=self.handle_client,
+                    args=(client_socket, client_address),
+                    daemon=True
+                )
+                try:
+                    client_thread.start()
+                except RuntimeError:
+                    self.server.limiter.release(client_address[0])
+                    self.reject(client_socket)
+
+            except socket.timeout:
+                continue
+            except Exception as e:
+                if self.server.running:
+                    log.error('accept_failed', error=str(e))
+
+    def handle_client(self, client_socket, client_address):
+        """Serve requests from one persistent connection until it closes"""
+        parser = self.server.create_parser(client_address[0])
+        timer = timing.connection(parser)
+        served = 0
+        try:
+            client_socket.settimeout(self.server.keep_alive_timeout)
+
+            while self.server.running:
+                request = parser.next_request()
+                timer.parsed(request)
+                if request is None:
+                    chunk = client_socket.recv(65536)
+                    if not chunk:
+                        break
+                    timer.received()
+                    parser.feed(chunk)
+                    continue
+
+                served += 1
+                close = self.should_close(request, served)
+
+                response = self.server.process_request(request)
+                timer.handled()
+                send_response(client_socket, response, close, request['version'] == 'HTTP/1.0')
+                timer.sent(request, response)
+                if close:
+                    break
+
+        except RequestError as e:
+            try:
+                error_response = self.server.handler.error_response(e.status_code, e.message)
+                send_response(client_socket, error_response, True)
+            except:
+                pass
+        except socket.timeout:
+            if parser.has_partial_request():
+                log.info('client_timeout', client=client_address[0])
+        except Exception as e:
+            log.error('client_failed', client=client_address[0], error=str(e))
+            try:
+                error_response = self.server.handler.error_response(500, "Internal Server Error")
+                send_response(client_socket, error_response, True)
+            except:
+                pass
+        finally:
+            self.server.limiter.release(client_address[0])
+            try:
+                client_socket.close()
+            except:
+                pass
+
+    def reject(self, client_socket):
+        """Refuse a connection over the admission limits without reading from it"""
+        try:
+            client_socket.setblocking(False)
+            client_socket.send(REJECT_RESPONSE)
+        except OSError:
+            pass
+        finally:
+            client_socket.close()
+
+    def should_close(self, request, served):
+        return (served >= self.server.max_keep_alive_requests
+                or not self.server.running
+                or not request['keep_alive'])
+
+    def stop(self, wait=True):
+        """Nothing to tear down, the accept loop watches server.running"""
+        pass
+
+
+class EventLoopEngine(ThreadedEngine):
+    """Multiplex all connections on one asyncio event loop.
+
+    Socket I/O never blocks a thread, so idle connections only cost a
+    coroutine each. Handlers still run synchronously (they talk to the
+    database), so complete requests are handed to a small thread pool.
+    """
+    name = 'eventloop'
+
+    def __init__(self, server, handler_threads=32):
+        super().__init__(server)
+        self.handler_threads = handler_threads
+        self.executor = None
+        self.loop = None
+        self.listeners = []
+
+    def serve(self, listen_sockets):
+        """Run the event loop until the server stops"""
+        raise_open_file_limit()
+        for listen_socket in listen_sockets:
+            listen_socket.setblocking(False)
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.handler_threads,
+            thread_name_prefix=f"{self.name}-handler"
+        )
+        try:
+            asyncio.run(self._serve(listen_sockets))
+        finally:
+            self.executor.shutdown(wait=False)
+
+    async def _serve(self, listen_sockets):
+        self.loop = asyncio.get_running_loop()
+        for listen_socket in listen_sockets:
+            self.listeners.append(await asyncio.start_server(
+                self.handle_connection, sock=listen_socket, backlog=self.server.backlog
+            ))
+        try:
+            await asyncio.gather(*(listener.serve_forever() for listener in self.listeners))
+        except asyncio.CancelledError:
+            pass
+        finally:
+            for listener in self.listeners:
+                listener.close()
+
+    async def handle_connection(self, reader, writer):
+        """Serve requests from one persistent connection until it closes"""
+        client_address = writer.get_extra_info('peername')
+        if not self.server.limiter.admit(client_address[0]):
+            # The transport sends straight to the socket when its buffer is empty
+            writer.write(REJECT_RESPONSE)
+            writer.close()
+            return
+        log.debug('connection_opened', client=f"{client_address[0]}:{client_address[1]}")
+        parser = self.server.create_parser(client_address[0])
+        timer = timing.connection(parser)
+        served = 0
+        try:
+            while self.server.running:
+                request = parser.next_request()
+                timer.parsed(request)
+                if request is None:
+                    # Flush responses to pipelined requests before waiting for more
+                    await writer.drain()
+                    chunk = await asyncio.wait_for(reader.read(65536), timeout=self.server.keep_alive_timeout)
+                    if not chunk:
+                        break
+                    timer.received()
+                    parser.feed(chunk)
+                    continue
+
+                served += 1
+                close = self.should_close(request, served)
+
+                if request['method'] == 'OPTIONS':
+                    # Constant response, not worth a trip through the thread pool
+                    response = self.server.process_request(request)
+                else:
+                    response = await self.loop.run_in_executor(self.executor, self.server.process_request, request)
+                timer.handled()
+                writer.writelines(response_parts(response, close, request['version'] == 'HTTP/1.0'))
+                timer.sent(request, response)
+                if close:
+                    break
+            await writer.drain()
+
+        except RequestError as e:
+            try:
+                error_response = self.server.handler.error_response(e.status_code, e.message)
+                writer.writelines(response_parts(error_response, True))
+                await writer.drain()
+            except:
+                pass
+        except asyncio.TimeoutError:
+            if parser.has_partial_request():
+                log.info('client_timeout', client=client_address[0])
+        except Exception as e:
+            log.error('client_failed', client=client_address[0], error=str(e))
+            try:
+                error_response = self.server.handler.error_response(500, "Internal Server Error")
+                writer.writelines(response_parts(error_response, True))
+                await writer.drain()
+            except:
+                pass
+        finally:
+            self.server.limiter.release(client_address[0])
+            try:
+                writer.close()
+            except:
+                pass
+
+    def stop(self, wait=True):
+        """Close the listeners from any thread, by default waiting until they are released"""
+        if self.loop and self.listeners and not self.loop.is_closed():
+            try:
+                future = asyncio.run_coroutine_threadsafe(self._close_listeners(), self.loop)
+                if wait:
+                    future.result(timeout=5)
+            except Exception:
+                pass
+
+    async def _close_listeners(self):
+        for listener in self.listeners:
+            listener.close()
+
+
+def raise_open_file_limit():
+    """Lift the soft descriptor limit to the hard limit so idle connections fit"""
+    if resource is None:
+        return
+    try:
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft != hard:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ValueError, OSError):
+        pass
+
+
+ENGINES = {
+    ThreadedEngine.name: ThreadedEngine,
+    EventLoopEngine.name: EventLoopEngine,
+}
+
+
+def create_engine(name, server):
+    """Build the serving engine registered under name"""
+    if name not in ENGINES:
+        raise ValueError(f"Unknown engine '{name}', choose from: {', '.join(ENGINES)}")
+    return ENGINES[name](server)
@@ -0,0 +1,92 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+
+SESSION_TTL = 3600
+TOKEN_VERSION = 'v1'
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+
+def _unb64(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def parse_keys(spec):
+    """[(key_id, secret)] from 'id:secret,id:secret'; the first key signs"""
+    keys = []
+    for item in spec.split(','):
+        key_id, sep, secret = item.strip().partition(':')
+        if not sep or not key_id or not secret or '.' in key_id:
+            raise ValueError("session keys must look like 'id:secret,id:secret' (no '.' in ids)")
+        keys.append((key_id, secret.encode('utf-8')))
+    return keys
+
+
+def generate_keys():
+    """One random signing key, for runs without configured keys"""
+    return f"k{int(time.time())}:{secrets.token_urlsafe(32)}"
+
+
+class SessionSigner:
+    """Issues and verifies HMAC-SHA256 signed, expiring session tokens.
+
+    A token is v1.<key id>.<payload>.<signature>, where the payload is
+    the base64url JSON of the user's public fields plus iat/exp. verify()
+    needs nothing but the keys, so authenticated reads cost no database
+    round trip. To rotate, put the new key first: it signs from then on
+    while the older keys keep verifying tokens issued before the switch.
+    """
+
+    def __init__(self, keys, ttl=SESSION_TTL):
+        if isinstance(keys, str):
+            keys = parse_keys(keys)
+        if not keys:
+            raise ValueError("at least one session key is required")
+        self.signing_key_id = keys[0][0]
+        self.keys = dict(keys)
+        self.ttl = ttl
+
+    def _sign(self, key, message):
+        return _b64(hmac.new(key, message, hashlib.sha256).digest())
+
+    def issue(self, user):
+        """Signed token for user (a dict of id, name, email, phone)"""
+        now = int(time.time())
+        claims = dict(user, iat=now, exp=now + self.ttl)
+        payload = _b64(json.dumps(claims, separators=(',', ':')).encode('utf-8'))
+        message = f"{TOKEN_VERSION}.{self.signing_key_id}.{payload}"
+        return f"{message}.{self._sign(self.keys[self.signing_key_id], message.encode('ascii'))}"
+
+    def verify(self, token):
+        """(valid, message, claims) for a token"""
+        parts = token.split('.')
+        if len(parts) != 4 or parts[0] != TOKEN_VERSION or not token.isascii():
+            return False, "Malformed session token", None
+
+        key = self.keys.get(parts[1])
+        if key is None:
+            return False, "Unknown session key", None
+
+        message = token[:token.rindex('.')]
+        if not hmac.compare_digest(self._sign(key, message.encode('ascii')), parts[3]):
+            return False, "Invalid session token", None
+
+        try:
+            claims = json.loads(_unb64(parts[2]))
+        except ValueError:
+            return False, "Malformed session token", None
+        if claims.get('exp', 0) < time.time():
+            return False, "Session expired", None
+        return True, "Session valid", claims
+
+
+def signer_from_environment(ttl=SESSION_TTL):
+    """SessionSigner for SHIFTXPRESS_SESSION_KEYS, or a random key if unset"""
+    return SessionSigner(os.environ.get('SHIFTXPRESS_SESSION_KEYS') or generate_keys(), ttl)
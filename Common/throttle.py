@@ -0,0 +1,107 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+EMAIL_RATE = 5.0
+EMAIL_BURST = 5
+IP_RATE = 60.0
+IP_BURST = 30
+MAX_KEYS = 100000
+
+
+class TokenBucketLimiter:
+    """Token buckets per key in a bounded LRU table.
+
+    Each key refills at rate tokens per minute up to burst. A bucket is
+    two floats in a list; once max_keys are tracked the least recently
+    used one is evicted. That is nearly always a bucket that has refilled
+    completely and so carries no state; evictions that lose tokens are
+    counted. rate 0 disables the limiter.
+    """
+
+    def __init__(self, rate, burst, max_keys=MAX_KEYS):
+        self.rate = rate / 60.0
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def acquire(self, key):
+        """Take a token for key; 0 when allowed, else seconds until one is available"""
+        if not self.rate:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._evict(now)
+                self._buckets[key] = [self.burst - 1, now]
+                return 0
+
+            self._buckets.move_to_end(key)
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if tokens >= 1:
+                bucket[0] = tokens - 1
+                return 0
+            bucket[0] = tokens
+            return (1 - tokens) / self.rate
+
+    def _evict(self, now):
+        # The oldest entries are the likeliest to have refilled completely
+        key, bucket = next(iter(self._buckets.items()))
+        if bucket[0] + (now - bucket[1]) * self.rate < self.burst:
+            self.evictions += 1
+        del self._buckets[key]
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class LoginThrottle:
+    """Per client address and per email limits for credential endpoints.
+
+    The address bucket is shared by every scope (login, reset link) while
+    email buckets are kept per scope. check() is cheap and meant to run
+    before any database or hashing work.
+    """
+
+    def __init__(self, email_rate=EMAIL_RATE, email_burst=EMAIL_BURST,
+                 ip_rate=IP_RATE, ip_burst=IP_BURST, max_keys=MAX_KEYS):
+        self.by_ip = TokenBucketLimiter(ip_rate, ip_burst, max_keys)
+        self.by_email = TokenBucketLimiter(email_rate, email_burst, max_keys)
+        self._lock = threading.Lock()
+        self._allowed = 0
+        self._rejected_ip = 0
+        self._rejected_email = 0
+
+    def check(self, client_ip, email, scope='login'):
+        """0 when the attempt may proceed, else whole seconds to put in Retry-After"""
+        wait = self.by_ip.acquire(client_ip) if client_ip else 0
+        if wait:
+            with self._lock:
+                self._rejected_ip += 1
+            return math.ceil(wait)
+
+        wait = self.by_email.acquire((scope, email.strip().lower()))
+        with self._lock:
+            if wait:
+                self._rejected_email += 1
+            else:
+                self._allowed += 1
+        return math.ceil(wait)
+
+    def stats(self):
+        """Throttle counters for /stats"""
+        with self._lock:
+            return {
+                'allowed': self._allowed,
+                'rejected_ip': self._rejected_ip,
+                'rejected_email': self._rejected_email,
+                'tracked_ips': len(self.by_ip),
+                'tracked_emails': len(self.by_email),
+                'evictions': self.by_ip.evictions + self.by_email.evictions,
+            }
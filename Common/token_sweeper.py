@@ -0,0 +1,88 @@
+import threading
+import time
+
+from db_pool import PoolError
+from event_log import log
+
+SWEEP_INTERVAL = 60.0
+SWEEP_BATCH_SIZE = 500
+SWEEP_PAUSE = 0.05
+
+
+class TokenSweeper:
+    """Background thread deleting expired password reset tokens.
+
+    Every interval seconds it deletes expired rows batch_size at a time
+    through the expires_at index, pausing between batches so a large
+    backlog never holds locks for long. Used tokens are left until they
+    expire so a second reset attempt still reports "Token already used".
+    Request threads never run cleanup.
+    """
+
+    def __init__(self, repository, interval=SWEEP_INTERVAL, batch_size=SWEEP_BATCH_SIZE,
+                 pause=SWEEP_PAUSE, name="Token sweeper"):
+        self.repository = repository
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pause = pause
+        self.name = name
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self.runs = 0
+        self.batches = 0
+        self.deleted = 0
+        self.last_run_at = None
+        self.last_run_ms = 0.0
+        self.last_deleted = 0
+        self.errors = 0
+        self.last_error = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name="token-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _loop(self):
+        while not self._stopped.wait(self.interval):
+            self.sweep()
+
+    def sweep(self):
+        """Delete every expired token, one bounded batch at a time"""
+        started = time.monotonic()
+        deleted = 0
+        try:
+            while not self._stopped.is_set():
+                batch = self.repository.delete_expired_tokens(self.batch_size)
+                self.batches += 1
+                deleted += batch
+                if batch < self.batch_size:
+                    break
+                time.sleep(self.pause)
+        except (PoolError, self.repository.Error) as e:
+            self.errors += 1
+            self.last_error = str(e)
+            log.warning('token_sweep_failed', error=str(e))
+
+        self.runs += 1
+        self.deleted += deleted
+        self.last_deleted = deleted
+        self.last_run_at = time.time()
+        self.last_run_ms = round((time.monotonic() - started) * 1000, 3)
+        return deleted
+
+    def stats(self):
+        return {
+            'interval': self.interval,
+            'batch_size': self.batch_size,
+            'runs': self.runs,
+            'batches': self.batches,
+            'deleted': self.deleted,
+            'last_deleted': self.last_deleted,
+            'last_run_at': self.last_run_at,
+            'last_run_ms': self.last_run_ms,
+            'errors': self.errors,
+            'last_error': self.last_error,
+        }
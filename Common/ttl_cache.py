@@ -0,0 +1,97 @@
+import heapq
+import threading
+import time
+
+TOKEN_CACHE_SIZE = 10000
+TOKEN_CACHE_TTL = 60.0
+
+
+class TTLCache:
+    """Bounded map whose entries expire at their own deadline.
+
+    A heap orders keys by expiry; when the cache is full the entry due
+    soonest is evicted, which is also the one least worth keeping.
+    Expired entries are dropped lazily on lookup and insert. Heap items
+    for keys since deleted or replaced are skipped when they surface, and
+    the heap is rebuilt if they pile up.
+    """
+
+    def __init__(self, max_entries=TOKEN_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = {}
+        self._expiry = []
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Cached value for key, or None if missing or expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[1] <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, ttl):
+        """Cache value for ttl seconds"""
+        if ttl <= 0 or not self.max_entries:
+            return
+        expires = time.monotonic() + ttl
+        with self._lock:
+            self._entries[key] = (value, expires)
+            heapq.heappush(self._expiry, (expires, key))
+            self._prune(time.monotonic())
+            if len(self._expiry) > 2 * self.max_entries:
+                # Too many stale heap items from deletes and replacements
+                self._expiry = [(entry[1], k) for k, entry in self._entries.items()]
+                heapq.heapify(self._expiry)
+
+    def delete(self, key):
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def _prune(self, now):
+        expiry = self._expiry
+        entries = self._entries
+        while expiry:
+            expires, key = expiry[0]
+            entry = entries.get(key)
+            if entry is None or entry[1] != expires:
+                heapq.heappop(expiry)  # stale heap item
+            elif expires <= now:
+                heapq.heappop(expiry)
+                del entries[key]
+                self.expirations += 1
+            elif len(entries) > self.max_entries:
+                heapq.heappop(expiry)
+                del entries[key]
+                self.evictions += 1
+            else:
+                break
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
@@ -0,0 +1,394 @@
+import hashlib
+import secrets
+import threading
+import time
+from collections import deque
+from bloom_filter import BLOOM_CAPACITY, BLOOM_ERROR_RATE, BloomFilter
+from db_backends import create_backend
+from db_pool import PoolError
+from event_log import log
+from group_commit import GROUP_COMMIT_MAX_ROWS, GROUP_COMMIT_WINDOW, GroupCommitter
+from password_hasher import PasswordHasher
+from ttl_cache import TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL, TTLCache
+
+RESET_TOKEN_TTL = 3600
+EMAIL_FILTER_REFRESH = 5.0
+EMAIL_FILTER_RESCAN = 12
+EMAIL_FILTER_REBUILD = 600.0
+
+
+def token_digest(token):
+    """What is stored for a reset token; the token itself never reaches the database"""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+class UserRepository:
+    """All user and reset token queries, shared by every service.
+
+    SQL lives in the backend (MySQL or SQLite) as named statements; this
+    class owns the business rules and the (success, message[, data])
+    results the handlers expect. Every operation is one round trip;
+    reset_password claims the token and changes the password atomically.
+
+    When an executor is attached, database work is submitted to it while
+    password hashing stays on the calling thread (and the hasher's
+    process pool), so slow KDF calls never hold a DB worker.
+    """
+    name = "Database"
+
+    def __init__(self, database=None, hasher=None):
+        self.backend = create_backend(database, self.name)
+        self.pool = self.backend.pool
+        self.Error = self.backend.Error
+        self.hasher = hasher or PasswordHasher()
+        self.executor = None
+        self.email_filter = None
+        self._filter_lock = threading.Lock()
+        self._filter_marks = deque(maxlen=EMAIL_FILTER_RESCAN)
+        self._filter_built_at = 0.0
+        self._filter_rebuild_interval = EMAIL_FILTER_REBUILD
+        self._filter_counts = {'checks': 0, 'negatives': 0, 'false_positives': 0, 'rebuilds': 0}
+        self.token_cache = None
+        self.token_cache_ttl = TOKEN_CACHE_TTL
+        self.group_commit = None
+        self.init_database()
+    
+    def run(self, fn, *args):
+        """Run a database call, on the executor when one is attached"""
+        if self.executor is None:
+            return fn(*args)
+        return self.executor.submit(fn, *args)
+    
+    def init_database(self):
+        """Create the users and reset token tables if missing"""
+        try:
+            self.backend.init_schema()
+            log.info('database_initialized', database=self.name, backend=self.backend.name)
+        except PoolError as e:
+            log.error('database_unavailable', database=self.name, error=str(e))
+        except self.Error as e:
+            log.error('database_init_failed', database=self.name, error=str(e))
+    
+    def connect(self):
+        """Check that a pooled database connection is available"""
+        try:
+            return self.run(self._ping)
+        except PoolError as e:
+            log.error('database_unavailable', database=self.name, error=str(e))
+            return False
+    
+    def _ping(self):
+        with self.pool.connection():
+            return True
+    
+    def disconnect(self):
+        """Close idle pooled connections"""
+        self.pool.close_all()
+    
+    def hash_password(self, password):
+        """Hash password with the configured KDF"""
+        return self.hasher.hash(password)
+    
+    def login_user(self, email, password):
+        """Authenticate user login"""
+        try:
+            row = self.run(self.backend.fetch_one, 'user_by_email', (email,))
+            if not row:
+                return False, "Invalid email or password", None
+            
+            user_id, name, email, phone, stored_hash = row
+            matches, needs_rehash = self.hasher.verify(password, stored_hash)
+            if not matches:
+                return False, "Invalid email or password", None
+            
+            if needs_rehash:
+                # Upgrade legacy SHA-256 (or outdated cost) hashes while the
+                # plain password is at hand; skipped if it changed meanwhile
+                self.run(self._execute, 'rehash_password', (self.hash_password(password), user_id, stored_hash))
+            
+            user = {'id': user_id, 'name': name, 'email': email, 'phone': phone}
+            return True, "Login successful", user
+                
+        except PoolError:
+            return False, "Database connection failed", None
+        except self.Error as e:
+            return False, f"Database error: {str(e)}", None
+    
+    def _execute(self, name, params):
+        with self.backend.session() as session:
+            return session.execute(name, params)
+    
+    def check_email_exists(self, email):
+        """Check if email exists in database"""
+        email_filter = self.email_filter
+        if email_filter is not None:
+            definitely_new = email.lower() not in email_filter
+            with self._filter_lock:
+                self._filter_counts['checks'] += 1
+                if definitely_new:
+                    self._filter_counts['negatives'] += 1
+            if definitely_new:
+                return False
+        
+        try:
+            exists = self.run(self.backend.fetch_one, 'email_exists', (email,)) is not None
+            if email_filter is not None and not exists:
+                with self._filter_lock:
+                    self._filter_counts['false_positives'] += 1
+            return exists
+            
+        except PoolError:
+            return False
+        except self.Error as e:
+            log.error('check_email_failed', error=str(e))
+            return False
+    
+    def register_user(self, name, email, phone, password):
+        """Register a new user"""
+        try:
+            hashed_password = self.hash_password(password)
+            
+            # The unique index on email rejects duplicates, no lookup first
+            row = (name, email, phone, hashed_password)
+            if self.group_commit is not None:
+                if not self.group_commit.submit(row):
+                    return False, "Email already registered"
+            else:
+                self.run(self._execute, 'insert_user', row)
+            if self.email_filter is not None:
+                self.email_filter.add(email.lower())
+            
+            return True, "Registration successful"
+            
+        except PoolError:
+            return False, "Database connection failed"
+        except self.backend.IntegrityError as e:
+            if self.backend.is_duplicate(e):
+                return False, "Email already registered"
+            return False, f"Database error: {str(e)}"
+        except self.Error as e:
+            return False, f"Database error: {str(e)}"
+    
+    def insert_users(self, rows):
+        """Insert (name, email, phone, password_hash) rows in one transaction.
+        
+        Rows whose email is already registered are skipped; returns how
+        many were inserted.
+        """
+        with self.backend.transaction() as tx:
+            return tx.execute_many('insert_user_ignore', rows)
+    
+    def iterate_users(self, after_id=0, batch_size=1000):
+        """Yield (id, name, email, phone, password_hash, created_at) rows in id order"""
+        with self.backend.session() as session:
+            yield from session.iterate('users_after', (after_id,), batch_size)
+    
+    def enable_group_commit(self, window=GROUP_COMMIT_WINDOW, max_rows=GROUP_COMMIT_MAX_ROWS):
+        """Commit concurrent registrations together, one transaction per batch"""
+        self.group_commit = GroupCommitter(self.backend, 'insert_user', window, max_rows,
+                                           run=self.run, name=f"{self.name} group commit")
+    
+    def enable_email_filter(self, capacity=BLOOM_CAPACITY, error_rate=BLOOM_ERROR_RATE,
+                            refresh_interval=EMAIL_FILTER_REFRESH, rebuild_interval=EMAIL_FILTER_REBUILD):
+        """Answer check_email_exists negatives from a Bloom filter of all emails.
+        
+        The filter is bulk loaded now and extended with users registered
+        through this process at once, and with users registered elsewhere
+        (other workers or services) every refresh_interval seconds. It is
+        rebuilt from scratch every rebuild_interval seconds (0: only when
+        full), which bounds how long a late-committed row can be missed.
+        """
+        self._filter_rebuild_interval = rebuild_interval
+        try:
+            self.email_filter = self._load_email_filter(BloomFilter(capacity, error_rate), 0)
+            self._filter_built_at = time.monotonic()
+            log.info('email_filter_loaded', emails=self.email_filter.count,
+                     bytes=self.email_filter.stats()['bytes'])
+        except (PoolError, self.Error) as e:
+            log.warning('email_filter_unavailable', error=str(e))
+            return
+        
+        if refresh_interval:
+            threading.Thread(target=self._refresh_email_filter_loop, args=(refresh_interval,),
+                             name="email-filter-refresh", daemon=True).start()
+    
+    def _load_email_filter(self, email_filter, after_id):
+        with self.backend.session() as session:
+            for user_id, email in session.iterate('emails_after', (after_id,)):
+                email_filter.add(email.lower())
+                after_id = user_id
+        # Highest id seen by each of the last loads, oldest first
+        self._filter_marks.append(after_id)
+        return email_filter
+    
+    def refresh_email_filter(self):
+        """Add recently registered users, rebuilding when full or due.
+        
+        Auto-increment ids can commit out of order, so a row may show up
+        below an id already loaded. Each refresh therefore re-scans every
+        id first seen by the last EMAIL_FILTER_RESCAN loads, not just the
+        new ones; a row committed later than that is only picked up by
+        the next full rebuild.
+        """
+        email_filter = self.email_filter
+        full = email_filter.count > email_filter.capacity
+        due = (self._filter_rebuild_interval
+               and time.monotonic() - self._filter_built_at >= self._filter_rebuild_interval)
+        if full or due:
+            # Over capacity the error rate climbs; rebuild with room to grow
+            capacity = max(email_filter.capacity, email_filter.count) * 2 if full else email_filter.capacity
+            rebuilt = BloomFilter(capacity, email_filter.error_rate)
+            self.email_filter = self._load_email_filter(rebuilt, 0)
+            self._filter_built_at = time.monotonic()
+            with self._filter_lock:
+                self._filter_counts['rebuilds'] += 1
+        else:
+            self._load_email_filter(email_filter, self._filter_marks[0])
+    
+    def _refresh_email_filter_loop(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.refresh_email_filter()
+            except (PoolError, self.Error) as e:
+                log.warning('email_filter_refresh_failed', error=str(e))
+    
+    def email_filter_stats(self):
+        """Filter size and how many checks it answered without SQL"""
+        if self.email_filter is None:
+            return None
+        with self._filter_lock:
+            counts = dict(self._filter_counts)
+        return dict(self.email_filter.stats(), **counts)
+    
+    def enable_token_cache(self, max_entries=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL):
+        """Serve repeated validate_reset_token calls for valid tokens from memory.
+        
+        Entries live at most ttl seconds, which bounds how long a token
+        used through another process can still look valid here;
+        reset_password re-checks in the database either way.
+        """
+        self.token_cache = TTLCache(max_entries)
+        self.token_cache_ttl = ttl
+    
+    def _cache_token(self, digest, email, expires_at):
+        if self.token_cache is not None:
+            ttl = min(self.token_cache_ttl, expires_at - time.time())
+            self.token_cache.set(digest, (email, expires_at), ttl)
+    
+    def create_reset_token(self, email):
+        """Create a password reset token"""
+        try:
+            token = secrets.token_urlsafe(32)
+            digest = token_digest(token)
+            expires_at = time.time() + RESET_TOKEN_TTL
+            
+            # Inserts only when the email belongs to a user
+            created = self.run(self._execute, 'insert_token', (digest, expires_at, email))
+            
+            if not created:
+                return False, "Email not found"
+            # The reset page validates the token as soon as it opens
+            self._cache_token(digest, email, expires_at)
+            return True, token
+            
+        except PoolError:
+            return False, "Database connection failed"
+        except self.Error as e:
+            return False, f"Database error: {str(e)}"
+    
+    def validate_reset_token(self, token):
+        """Validate reset token"""
+        digest = token_digest(token)
+        if self.token_cache is not None:
+            cached = self.token_cache.get(digest)
+            if cached is not None and time.time() <= cached[1]:
+                return True, "Token valid", cached[0]
+        
+        try:
+            token_data = self.run(self.backend.fetch_one, 'token', (digest,))
+            valid, message, email = self._check_token(token_data)
+            if valid:
+                self._cache_token(digest, email, float(token_data[1]))
+            return valid, message, email
+            
+        except PoolError:
+            return False, "Database connection failed", None
+        except self.Error as e:
+            return False, f"Database error: {str(e)}", None
+    
+    def _check_token(self, token_data):
+        if not token_data:
+            return False, "Invalid token", None
+        
+        email, expires_at, used = token_data
+        if used:
+            return False, "Token already used", None
+        
+        # Check if token is expired
+        if time.time() > float(expires_at):
+            return False, "Token expired", None
+        
+        return True, "Token valid", email
+    
+    def reset_password(self, token, new_password):
+        """Reset user password using token.
+        
+        The token is checked before the new password is hashed, from the
+        token cache when it holds it and with one lookup otherwise, so
+        unknown, used and expired tokens are refused without running the
+        KDF. The atomic statement that claims the token and changes the
+        password still decides: a token used elsewhere since the check
+        is refused there.
+        """
+        try:
+            digest = token_digest(token)
+            cached = self.token_cache.get(digest) if self.token_cache is not None else None
+            if cached is None or time.time() > cached[1]:
+                token_data = self.run(self.backend.fetch_one, 'token', (digest,))
+                valid, message, email = self._check_token(token_data)
+                if not valid:
+                    return False, message
+            
+            hashed_password = self.hash_password(new_password)
+            try:
+                claimed = self.run(self.backend.reset_password, digest, hashed_password, time.time())
+            finally:
+                if self.token_cache is not None:
+                    self.token_cache.delete(digest)
+            
+            if not claimed:
+                # Used or expired between the check and the claim
+                token_data = self.run(self.backend.fetch_one, 'token', (digest,))
+                valid, message, email = self._check_token(token_data)
+                return False, message if not valid else "Invalid token"
+            return True, "Password reset successfully"
+            
+        except PoolError:
+            return False, "Database connection failed"
+        except self.Error as e:
+            return False, f"Database error: {str(e)}"
+    
+    def reset_token_counts(self):
+        """{'total', 'used', 'expired'} rows in the reset token table"""
+        total, used, expired = self.run(self.backend.fetch_one, 'token_counts', (time.time(),))
+        return {'total': int(total), 'used': int(used), 'expired': int(expired)}
+    
+    def delete_expired_tokens(self, batch_size):
+        """Delete up to batch_size expired reset tokens, returning how many went"""
+        return self._execute('delete_expired_tokens', (time.time(), batch_size))
+    
+    def cleanup_expired_tokens(self, batch_size=1000):
+        """Clean up expired reset tokens in batches until none are left"""
+        try:
+            deleted = batch = self.delete_expired_tokens(batch_size)
+            while batch == batch_size:
+                batch = self.delete_expired_tokens(batch_size)
+                deleted += batch
+            return deleted
+            
+        except PoolError:
+            return 0
+        except self.Error as e:
+            log.error('token_cleanup_failed', error=str(e))
+            return 0
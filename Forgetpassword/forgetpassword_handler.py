@@ -1,9 +1,15 @@
 import json
 from forgetpassword_database import ForgetPasswordDatabase
+from db_executor import DatabaseBusy
+from event_log import log
+from request_timing import timing
+from http_parser import parse_request
+import http_response
 
 class ForgetPasswordRequestHandler:
-    def __init__(self):
-        self.db = ForgetPasswordDatabase()
+    def __init__(self, db=None, throttle=None):
+        self.throttle = throttle
+        self.db = db or ForgetPasswordDatabase()
         self.routes = {
             'POST': {
                 '/send_reset_link': self.handle_send_reset_link,
@@ -16,56 +22,19 @@ class ForgetPasswordRequestHandler:
             }
         }
     
-    def parse_request(self, request_data):
-        """Parse HTTP request"""
-        try:
-            if not request_data or not request_data.strip():
-                return None
-            
-            lines = request_data.strip().split('\r\n')
-            if not lines:
-                return None
-            
-            request_line = lines[0]
-            parts = request_line.split(' ')
-            if len(parts) < 3:
-                return None
-                
-            method, path, _ = parts[0], parts[1], parts[2]
-            
-            headers = {}
-            body = None
-            i = 1
-            
-            while i < len(lines) and lines[i].strip():
-                if ':' in lines[i]:
-                    key, value = lines[i].split(':', 1)
-                    headers[key.strip()] = value.strip()
-                i += 1
-            
-            if i + 1 < len(lines):
-                body = '\r\n'.join(lines[i+1:])
-            
-            return {
-                'method': method,
-                'path': path,
-                'headers': headers,
-                'body': body
-            }
-        except Exception as e:
-            print(f"❌ Error parsing request: {e}")
-            return None
-    
     def handle_request(self, request_data):
-        """Handle incoming request and return response"""
-        request = self.parse_request(request_data)
+        """Handle incoming raw request and return response"""
+        request = parse_request(request_data)
         if not request:
             return self.error_response(400, "Bad Request")
-        
+        return self.dispatch(request)
+    
+    def dispatch(self, request):
+        """Route a parsed request and return response"""
         method = request['method']
         path = request['path']
         
-        print(f"🔄 Forget Password Server: Handling {method} {path}")
+        log.info('request', route=path, method=method, sampled=True)
         
         if method in self.routes:
             if path in self.routes[method]:
@@ -91,12 +60,10 @@ class ForgetPasswordRequestHandler:
     
     def handle_health(self, request):
         """Health check endpoint"""
-        db_connected = self.db.connect()
-        return self.json_response(200, {
-            "success": True,
-            "status": "healthy",
-            "database": "connected" if db_connected else "disconnected"
-        })
+        try:
+            return http_response.health_response(self.db.connect())
+        except DatabaseBusy as e:
+            return self.busy_response(e.retry_after)
     
     def handle_send_reset_link(self, request):
         """Handle sending password reset link"""
@@ -104,19 +71,28 @@ class ForgetPasswordRequestHandler:
             if not request['body']:
                 return self.error_response(400, "No data provided")
             
-            data = json.loads(request['body'])
+            with timing.phase('json'):
+                data = json.loads(request['body'])
             email = data.get('email', '').strip().lower()
             
-            print(f"📧 Password reset request for: {email}")
+            log.debug('reset_link_requested', route='/send_reset_link', email=email)
             
             if not email:
                 return self.error_response(400, "Email is required")
             
+            if self.throttle:
+                retry_after = self.throttle.check(request['client'], email, 'reset')
+                if retry_after:
+                    log.warning('reset_link_throttled', route='/send_reset_link', email=email,
+                                client=request['client'])
+                    return self.throttled_response(retry_after)
+            
             # Create reset token
-            success, result = self.db.create_reset_token(email)
+            with timing.phase('create_reset_token'):
+                success, result = self.db.create_reset_token(email)
             
             if success:
-                print(f"✅ Reset token created for: {email}")
+                log.info('reset_link_sent', route='/send_reset_link', email=email, sampled=True)
                 # In a real application, you would send an email here
                 # For demo purposes, we'll return the token
                 return self.json_response(200, {
@@ -126,7 +102,7 @@ class ForgetPasswordRequestHandler:
                     "reset_url": f"http://localhost:8083/reset.html?token={result}&email={email}"
                 })
             else:
-                print(f"❌ Failed to create reset token for: {email}")
+                log.info('reset_link_failed', route='/send_reset_link', email=email, reason=result)
                 return self.json_response(400, {
                     "success": False,
                     "message": result
@@ -134,8 +110,10 @@ class ForgetPasswordRequestHandler:
                 
         except json.JSONDecodeError:
             return self.error_response(400, "Invalid JSON data")
+        except DatabaseBusy as e:
+            return self.busy_response(e.retry_after)
         except Exception as e:
-            print(f"❌ Server error in send_reset_link: {e}")
+            log.error('server_error', route='/send_reset_link', error=str(e))
             return self.error_response(500, f"Server error: {str(e)}")
     
     def handle_reset_password(self, request):
@@ -144,7 +122,8 @@ class ForgetPasswordRequestHandler:
             if not request['body']:
                 return self.error_response(400, "No data provided")
             
-            data = json.loads(request['body'])
+            with timing.phase('json'):
+                data = json.loads(request['body'])
             token = data.get('token', '')
             new_password = data.get('newPassword', '')
             confirm_password = data.get('confirmPassword', '')
@@ -159,16 +138,17 @@ class ForgetPasswordRequestHandler:
                 return self.error_response(400, "Password must be at least 6 characters")
             
             # Reset password
-            success, message = self.db.reset_password(token, new_password)
+            with timing.phase('reset_password'):
+                success, message = self.db.reset_password(token, new_password)
             
             if success:
-                print(f"✅ Password reset successful for token: {token}")
+                log.info('password_reset', route='/reset_password', sampled=True)
                 return self.json_response(200, {
                     "success": True,
                     "message": message
                 })
             else:
-                print(f"❌ Password reset failed for token: {token}")
+                log.info('password_reset_failed', route='/reset_password', reason=message)
                 return self.json_response(400, {
                     "success": False,
                     "message": message
@@ -176,8 +156,10 @@ class ForgetPasswordRequestHandler:
                 
         except json.JSONDecodeError:
             return self.error_response(400, "Invalid JSON data")
+        except DatabaseBusy as e:
+            return self.busy_response(e.retry_after)
         except Exception as e:
-            print(f"❌ Server error in reset_password: {e}")
+            log.error('server_error', route='/reset_password', error=str(e))
             return self.error_response(500, f"Server error: {str(e)}")
     
     def handle_validate_token(self, request):
@@ -186,14 +168,16 @@ class ForgetPasswordRequestHandler:
             if not request['body']:
                 return self.error_response(400, "No data provided")
             
-            data = json.loads(request['body'])
+            with timing.phase('json'):
+                data = json.loads(request['body'])
             token = data.get('token', '')
             
             if not token:
                 return self.error_response(400, "Token is required")
             
             # Validate token
-            valid, message, email = self.db.validate_reset_token(token)
+            with timing.phase('validate_reset_token'):
+                valid, message, email = self.db.validate_reset_token(token)
             
             return self.json_response(200, {
                 "success": valid,
@@ -203,28 +187,24 @@ class ForgetPasswordRequestHandler:
                 
         except json.JSONDecodeError:
             return self.error_response(400, "Invalid JSON data")
+        except DatabaseBusy as e:
+            return self.busy_response(e.retry_after)
         except Exception as e:
-            print(f"❌ Server error in validate_token: {e}")
+            log.error('server_error', route='/validate_token', error=str(e))
             return self.error_response(500, f"Server error: {str(e)}")
     
     def json_response(self, status_code, data):
         """Create JSON response"""
-        response_json = json.dumps(data)
-        response = f"HTTP/1.1 {status_code} {'OK' if status_code == 200 else 'Error'}\r\n"
-        response += "Content-Type: application/json\r\n"
-        response += "Access-Control-Allow-Origin: *\r\n"
-        response += "Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n"
-        response += "Access-Control-Allow-Headers: Content-Type, Authorization\r\n"
-        response += f"Content-Length: {len(response_json)}\r\n"
-        response += "Connection: close\r\n"
-        response += "\r\n"
-        response += response_json
-        return response
+        return http_response.json_response(status_code, data)
     
     def error_response(self, status_code, message):
         """Create error response"""
-        return self.json_response(status_code, {
-            "success": False,
-            "error": message,
-            "status_code": status_code
-        })
\ No newline at end of file
+        return http_response.error_response(status_code, message)
+    
+    def busy_response(self, retry_after):
+        """Create 503 response for a saturated database queue"""
+        return http_response.busy_response(retry_after)
+    
+    def throttled_response(self, retry_after):
+        """Create 429 response for a throttled client"""
+        return http_response.throttled_response(retry_after)
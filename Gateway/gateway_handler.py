@@ -0,0 +1,62 @@
+from http_parser import parse_request
+from event_log import log
+import http_response
+
+class GatewayRequestHandler:
+    """Serve the route tables of several handlers from one listener.
+
+    Routes are flattened once into a (method, path) dict, so a request
+    costs a single lookup whichever service it belongs to. When two
+    handlers register the same route the first one mounted wins.
+    """
+
+    def __init__(self, handlers):
+        self.handlers = handlers
+        self.routes = {}
+        for handler in handlers:
+            for method, paths in handler.routes.items():
+                for path, route in paths.items():
+                    self.routes.setdefault((method, path), route)
+        self.routes[('GET', '/')] = self.handle_root
+        self.methods = {method for method, _ in self.routes}
+    
+    def handle_request(self, request_data):
+        """Handle incoming raw request and return response"""
+        request = parse_request(request_data)
+        if not request:
+            return self.error_response(400, "Bad Request")
+        return self.dispatch(request)
+    
+    def dispatch(self, request):
+        """Route a parsed request and return response"""
+        method = request['method']
+        path = request['path']
+        
+        log.info('request', route=path, method=method, sampled=True)
+        
+        route = self.routes.get((method, path))
+        if route:
+            return route(request)
+        if method in self.methods:
+            return self.error_response(404, f"Endpoint {path} not found")
+        return self.error_response(405, f"Method {method} not allowed")
+    
+    def endpoints(self):
+        """Every mounted route as 'METHOD /path'"""
+        return [f"{method} {path}" for method, path in sorted(self.routes)]
+    
+    def handle_root(self, request):
+        """Handle root path"""
+        return self.json_response(200, {
+            "success": True,
+            "message": "Welcome to ShiftXpress API Gateway",
+            "endpoints": self.endpoints()
+        })
+    
+    def json_response(self, status_code, data):
+        """Create JSON response"""
+        return http_response.json_response(status_code, data)
+    
+    def error_response(self, status_code, message):
+        """Create error response"""
+        return http_response.error_response(status_code, message)
@@ -0,0 +1,45 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(__file__))
+for service in ('Common', 'Loginpage', 'Signup', 'Forgetpassword'):
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', service))
+
+from gateway_handler import GatewayRequestHandler
+from user_repository import UserRepository
+from login_handler import LoginRequestHandler
+from signup_handler import SignupRequestHandler
+from forgetpassword_handler import ForgetPasswordRequestHandler
+from base_server import BaseServer, run_server
+
+# Ports of the standalone services, for --alias-ports
+SERVICE_PORTS = [5001, 5002, 8083]
+
+class GatewayServer(BaseServer):
+    name = "API Gateway"
+
+    # One repository (and connection pool) behind every mounted service
+    database_class = UserRepository
+    serves_reset_tokens = True
+    uses_email_filter = True
+    serves_signups = True
+
+    def __init__(self, host='127.0.0.1', port=8080, **options):
+        super().__init__(host, port, **options)
+
+    def create_handler(self, db):
+        handler = GatewayRequestHandler([
+            LoginRequestHandler(db, self.throttle, self.sessions),
+            SignupRequestHandler(db),
+            ForgetPasswordRequestHandler(db, self.throttle),
+        ])
+        self.endpoints = handler.endpoints()
+        return handler
+
+def add_gateway_arguments(parser):
+    parser.add_argument('--alias-ports', type=int, nargs='*', default=[],
+                        help=f"Extra ports served by the gateway, e.g. the old "
+                             f"per-service ports {' '.join(map(str, SERVICE_PORTS))}")
+
+if __name__ == '__main__':
+    run_server(GatewayServer, 8080, add_arguments=add_gateway_arguments)
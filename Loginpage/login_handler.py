@@ -1,69 +1,41 @@
 import json
 from login_database import LoginDatabase
+from db_executor import DatabaseBusy
+from event_log import log
+from request_timing import timing
+from session_tokens import signer_from_environment
+from http_parser import parse_request
+import http_response
 
 class LoginRequestHandler:
-    def __init__(self):
-        self.db = LoginDatabase()
+    def __init__(self, db=None, throttle=None, sessions=None):
+        self.throttle = throttle
+        self.sessions = sessions or signer_from_environment()
+        self.db = db or LoginDatabase()
         self.routes = {
             'POST': {
                 '/api/login': self.handle_login,
             },
             'GET': {
                 '/': self.handle_root,
-                '/api/health': self.handle_health
+                '/api/health': self.handle_health,
+                '/api/me': self.handle_me
             }
         }
     
-    def parse_request(self, request_data):
-        """Parse HTTP request"""
-        try:
-            if not request_data or not request_data.strip():
-                return None
-            
-            lines = request_data.strip().split('\r\n')
-            if not lines:
-                return None
-            
-            request_line = lines[0]
-            parts = request_line.split(' ')
-            if len(parts) < 3:
-                return None
-                
-            method, path, _ = parts[0], parts[1], parts[2]
-            
-            headers = {}
-            body = None
-            i = 1
-            
-            while i < len(lines) and lines[i].strip():
-                if ':' in lines[i]:
-                    key, value = lines[i].split(':', 1)
-                    headers[key.strip()] = value.strip()
-                i += 1
-            
-            if i + 1 < len(lines):
-                body = '\r\n'.join(lines[i+1:])
-            
-            return {
-                'method': method,
-                'path': path,
-                'headers': headers,
-                'body': body
-            }
-        except Exception as e:
-            print(f"❌ Error parsing request: {e}")
-            return None
-    
     def handle_request(self, request_data):
-        """Handle incoming request and return response"""
-        request = self.parse_request(request_data)
+        """Handle incoming raw request and return response"""
+        request = parse_request(request_data)
         if not request:
             return self.error_response(400, "Bad Request")
-        
+        return self.dispatch(request)
+    
+    def dispatch(self, request):
+        """Route a parsed request and return response"""
         method = request['method']
         path = request['path']
         
-        print(f"🔄 Login Server: Handling {method} {path}")
+        log.info('request', route=path, method=method, sampled=True)
         
         if method in self.routes:
             if path in self.routes[method]:
@@ -80,6 +52,7 @@ class LoginRequestHandler:
             "message": "Welcome to Login API",
             "endpoints": {
                 "POST /api/login": "User login",
+                "GET /api/me": "Current user from the session token",
                 "GET /api/health": "Health check"
             }
         }
@@ -87,12 +60,10 @@ class LoginRequestHandler:
     
     def handle_health(self, request):
         """Health check endpoint"""
-        db_connected = self.db.connect()
-        return self.json_response(200, {
-            "success": True,
-            "status": "healthy",
-            "database": "connected" if db_connected else "disconnected"
-        })
+        try:
+            return http_response.health_response(self.db.connect())
+        except DatabaseBusy as e:
+            return self.busy_response(e.retry_after)
     
     def handle_login(self, request):
         """Handle user login"""
@@ -100,26 +71,36 @@ class LoginRequestHandler:
             if not request['body']:
                 return self.error_response(400, "No data provided")
             
-            data = json.loads(request['body'])
+            with timing.phase('json'):
+                data = json.loads(request['body'])
             email = data.get('email', '').strip().lower()
             password = data.get('password', '')
             
-            print(f"🔐 Login attempt for: {email}")
+            log.debug('login_attempt', route='/api/login', email=email)
             
             if not email or not password:
                 return self.error_response(400, "Email and password are required")
             
-            success, message, user = self.db.login_user(email, password)
+            if self.throttle:
+                retry_after = self.throttle.check(request['client'], email, 'login')
+                if retry_after:
+                    log.warning('login_throttled', route='/api/login', email=email, client=request['client'])
+                    return self.throttled_response(retry_after)
+            
+            with timing.phase('login_user'):
+                success, message, user = self.db.login_user(email, password)
             
             if success:
-                print(f"✅ Login successful for: {email}")
+                log.info('login_succeeded', route='/api/login', email=email, sampled=True)
                 return self.json_response(200, {
                     "success": True, 
                     "message": message,
-                    "user": user
+                    "user": user,
+                    "token": self.sessions.issue(user),
+                    "expires_in": self.sessions.ttl
                 })
             else:
-                print(f"❌ Login failed for: {email}")
+                log.info('login_failed', route='/api/login', email=email)
                 return self.json_response(401, {
                     "success": False, 
                     "message": message
@@ -127,28 +108,41 @@ class LoginRequestHandler:
                 
         except json.JSONDecodeError:
             return self.error_response(400, "Invalid JSON data")
+        except DatabaseBusy as e:
+            return self.busy_response(e.retry_after)
         except Exception as e:
-            print(f"❌ Server error in login: {e}")
+            log.error('server_error', route='/api/login', error=str(e))
             return self.error_response(500, f"Server error: {str(e)}")
     
+    def handle_me(self, request):
+        """Return the user of a Bearer session token, verified without the database"""
+        scheme, _, token = request['headers'].get('authorization', '').partition(' ')
+        if scheme.lower() != 'bearer' or not token:
+            return self.error_response(401, "Missing session token")
+        
+        valid, message, claims = self.sessions.verify(token.strip())
+        if not valid:
+            return self.error_response(401, message)
+        
+        user = {key: claims.get(key) for key in ('id', 'name', 'email', 'phone')}
+        return self.json_response(200, {
+            "success": True,
+            "user": user,
+            "expires_at": claims['exp']
+        })
+    
     def json_response(self, status_code, data):
         """Create JSON response"""
-        response_json = json.dumps(data)
-        response = f"HTTP/1.1 {status_code} {'OK' if status_code == 200 else 'Error'}\r\n"
-        response += "Content-Type: application/json\r\n"
-        response += "Access-Control-Allow-Origin: *\r\n"
-        response += "Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n"
-        response += "Access-Control-Allow-Headers: Content-Type, Authorization\r\n"
-        response += f"Content-Length: {len(response_json)}\r\n"
-        response += "Connection: close\r\n"
-        response += "\r\n"
-        response += response_json
-        return response
+        return http_response.json_response(status_code, data)
     
     def error_response(self, status_code, message):
         """Create error response"""
-        return self.json_response(status_code, {
-            "success": False,
-            "error": message,
-            "status_code": status_code
-        })
\ No newline at end of file
+        return http_response.error_response(status_code, message)
+    
+    def busy_response(self, retry_after):
+        """Create 503 response for a saturated database queue"""
+        return http_response.busy_response(retry_after)
+    
+    def throttled_response(self, retry_after):
+        """Create 429 response for a throttled client"""
+        return http_response.throttled_response(retry_after)
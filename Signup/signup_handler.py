@@ -1,9 +1,14 @@
 import json
 from signup_database import SignupDatabase
+from db_executor import DatabaseBusy
+from event_log import log
+from request_timing import timing
+from http_parser import parse_request
+import http_response
 
 class SignupRequestHandler:
-    def __init__(self):
-        self.db = SignupDatabase()
+    def __init__(self, db=None):
+        self.db = db or SignupDatabase()
         self.routes = {
             'POST': {
                 '/api/signup': self.handle_signup,
@@ -15,56 +20,19 @@ class SignupRequestHandler:
             }
         }
     
-    def parse_request(self, request_data):
-        """Parse HTTP request"""
-        try:
-            if not request_data or not request_data.strip():
-                return None
-            
-            lines = request_data.strip().split('\r\n')
-            if not lines:
-                return None
-            
-            request_line = lines[0]
-            parts = request_line.split(' ')
-            if len(parts) < 3:
-                return None
-                
-            method, path, _ = parts[0], parts[1], parts[2]
-            
-            headers = {}
-            body = None
-            i = 1
-            
-            while i < len(lines) and lines[i].strip():
-                if ':' in lines[i]:
-                    key, value = lines[i].split(':', 1)
-                    headers[key.strip()] = value.strip()
-                i += 1
-            
-            if i + 1 < len(lines):
-                body = '\r\n'.join(lines[i+1:])
-            
-            return {
-                'method': method,
-                'path': path,
-                'headers': headers,
-                'body': body
-            }
-        except Exception as e:
-            print(f"❌ Error parsing request: {e}")
-            return None
-    
     def handle_request(self, request_data):
-        """Handle incoming request and return response"""
-        request = self.parse_request(request_data)
+        """Handle incoming raw request and return response"""
+        request = parse_request(request_data)
         if not request:
             return self.error_response(400, "Bad Request")
-        
+        return self.dispatch(request)
+    
+    def dispatch(self, request):
+        """Route a parsed request and return response"""
         method = request['method']
         path = request['path']
         
-        print(f"🔄 Signup Server: Handling {method} {path}")
+        log.info('request', route=path, method=method, sampled=True)
         
         if method in self.routes:
             if path in self.routes[method]:
@@ -89,12 +57,10 @@ class SignupRequestHandler:
     
     def handle_health(self, request):
         """Health check endpoint"""
-        db_connected = self.db.connect()
-        return self.json_response(200, {
-            "success": True,
-            "status": "healthy",
-            "database": "connected" if db_connected else "disconnected"
-        })
+        try:
+            return http_response.health_response(self.db.connect())
+        except DatabaseBusy as e:
+            return self.busy_response(e.retry_after)
     
     def handle_signup(self, request):
         """Handle user registration"""
@@ -102,14 +68,15 @@ class SignupRequestHandler:
             if not request['body']:
                 return self.error_response(400, "No data provided")
             
-            data = json.loads(request['body'])
+            with timing.phase('json'):
+                data = json.loads(request['body'])
             name = data.get('name', '').strip()
             email = data.get('email', '').strip().lower()
             phone = data.get('phone', '').strip()
             password = data.get('password', '')
             confirm_password = data.get('confirmPassword', '')
             
-            print(f"📝 Signup attempt for: {email}")
+            log.debug('signup_attempt', route='/api/signup', email=email)
             
             # Validation
             if not all([name, email, phone, password, confirm_password]):
@@ -122,20 +89,23 @@ class SignupRequestHandler:
                 return self.error_response(400, "Password must be at least 6 characters")
             
             # Register user
-            success, message = self.db.register_user(name, email, phone, password)
+            with timing.phase('register_user'):
+                success, message = self.db.register_user(name, email, phone, password)
             
             if success:
-                print(f"✅ Signup successful for: {email}")
+                log.info('signup_succeeded', route='/api/signup', email=email, sampled=True)
                 return self.json_response(201, {"success": True, "message": message})
             else:
-                print(f"❌ Signup failed for: {email} - {message}")
+                log.info('signup_failed', route='/api/signup', email=email, reason=message)
                 return self.json_response(400, {"success": False, "message": message})
                 
         except json.JSONDecodeError as e:
-            print(f"❌ JSON decode error: {e}")
+            log.info('invalid_json', route='/api/signup', error=str(e))
             return self.error_response(400, "Invalid JSON data")
+        except DatabaseBusy as e:
+            return self.busy_response(e.retry_after)
         except Exception as e:
-            print(f"❌ Server error in signup: {e}")
+            log.error('server_error', route='/api/signup', error=str(e))
             return self.error_response(500, f"Server error: {str(e)}")
     
     def handle_check_email(self, request):
@@ -144,35 +114,29 @@ class SignupRequestHandler:
             if not request['body']:
                 return self.error_response(400, "No data provided")
             
-            data = json.loads(request['body'])
+            with timing.phase('json'):
+                data = json.loads(request['body'])
             email = data.get('email', '').strip().lower()
             
-            exists = self.db.check_email_exists(email)
+            with timing.phase('check_email_exists'):
+                exists = self.db.check_email_exists(email)
             return self.json_response(200, {"exists": exists})
             
         except json.JSONDecodeError:
             return self.error_response(400, "Invalid JSON data")
+        except DatabaseBusy as e:
+            return self.busy_response(e.retry_after)
         except Exception as e:
             return self.error_response(500, f"Server error: {str(e)}")
     
     def json_response(self, status_code, data):
         """Create JSON response"""
-        response_json = json.dumps(data)
-        response = f"HTTP/1.1 {status_code} {'OK' if status_code == 200 else 'Error'}\r\n"
-        response += "Content-Type: application/json\r\n"
-        response += "Access-Control-Allow-Origin: *\r\n"
-        response += "Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n"
-        response += "Access-Control-Allow-Headers: Content-Type, Authorization\r\n"
-        response += f"Content-Length: {len(response_json)}\r\n"
-        response += "Connection: close\r\n"
-        response += "\r\n"
-        response += response_json
-        return response
+        return http_response.json_response(status_code, data)
     
     def error_response(self, status_code, message):
         """Create error response"""
-        return self.json_response(status_code, {
-            "success": False,
-            "error": message,
-            "status_code": status_code
-        })
\ No newline at end of file
+        return http_response.error_response(status_code, message)
+    
+    def busy_response(self, retry_after):
+        """Create 503 response for a saturated database queue"""
+        return http_response.busy_response(retry_after)
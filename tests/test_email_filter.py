@@ -0,0 +1,53 @@
+import sys
+import os
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Common'))
+
+from password_hasher import PasswordHasher
+from user_repository import EMAIL_FILTER_RESCAN, UserRepository
+
+
+class EmailFilterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.repository = UserRepository('sqlite::memory:', PasswordHasher(cost=1000, algorithm='pbkdf2_sha256',
+                                                                           processes=0))
+
+    def insert(self, user_id, email):
+        # An explicit id stands in for a row that committed after higher ids
+        with self.repository.backend.transaction() as tx:
+            tx.connection.execute("INSERT INTO users (id, name, email, phone, password) VALUES (?, 'A', ?, '1', 'x')",
+                                  (user_id, email))
+
+    def test_refresh_picks_up_rows_committed_below_loaded_ids(self):
+        self.insert(10, 'ten@x.com')
+        self.repository.enable_email_filter(refresh_interval=0)
+        self.insert(20, 'twenty@x.com')
+        self.repository.refresh_email_filter()
+
+        self.insert(15, 'late@x.com')
+        self.repository.refresh_email_filter()
+
+        self.assertIn('late@x.com', self.repository.email_filter)
+        self.assertEqual(self.repository.email_filter.count, 3)
+
+    def test_rows_older_than_the_rescan_window_wait_for_the_rebuild(self):
+        self.insert(10, 'ten@x.com')
+        self.repository.enable_email_filter(refresh_interval=0, rebuild_interval=3600)
+        for user_id in range(20, 20 + EMAIL_FILTER_RESCAN + 1):
+            self.insert(user_id, f'{user_id}@x.com')
+            self.repository.refresh_email_filter()
+
+        self.insert(15, 'very-late@x.com')
+        self.repository.refresh_email_filter()
+        self.assertFalse(self.repository.check_email_exists('very-late@x.com'))
+
+        self.repository._filter_built_at -= 3600
+        self.repository.refresh_email_filter()
+        self.assertTrue(self.repository.check_email_exists('very-late@x.com'))
+        self.assertEqual(self.repository.email_filter_stats()['rebuilds'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import sys
+import os
+import sqlite3
+import threading
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Common'))
+
+from db_backends import SQLiteBackend
+from group_commit import GroupCommitter
+
+
+def user(email, name='A'):
+    return (name, email, '1234567890', 'hash')
+
+
+class GroupCommitterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = SQLiteBackend(':memory:')
+        self.backend.init_schema()
+
+    def submit_together(self, committer, rows):
+        """Submit rows from one thread each; per-row result or exception"""
+        results = [None] * len(rows)
+
+        def submit(index):
+            try:
+                results[index] = committer.submit(rows[index])
+            except Exception as e:
+                results[index] = e
+
+        threads = [threading.Thread(target=submit, args=(index,)) for index in range(len(rows))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+        return results
+
+    def emails(self):
+        with self.backend.session() as session:
+            return sorted(email for _, email in session.fetch_all('emails_after', (0,)))
+
+    def test_each_caller_gets_its_own_row_count(self):
+        with self.backend.transaction() as tx:
+            tx.execute('insert_user', user('taken@x.com'))
+        rows = [user('a@x.com'), user('taken@x.com'), user('b@x.com'), user('c@x.com')]
+        committer = GroupCommitter(self.backend, 'insert_user', window=5, max_rows=len(rows))
+
+        results = self.submit_together(committer, rows)
+
+        self.assertEqual(results, [1, 0, 1, 1])
+        self.assertEqual(committer.stats()['batches'], 1)
+        self.assertEqual(self.emails(), ['a@x.com', 'b@x.com', 'c@x.com', 'taken@x.com'])
+
+    def test_duplicate_inside_one_batch_is_rejected_once(self):
+        rows = [user('same@x.com', 'first'), user('same@x.com', 'second'), user('other@x.com')]
+        committer = GroupCommitter(self.backend, 'insert_user', window=5, max_rows=len(rows))
+
+        results = self.submit_together(committer, rows)
+
+        self.assertEqual(sorted(results[:2]), [0, 1])
+        self.assertEqual(results[2], 1)
+        self.assertEqual(self.emails(), ['other@x.com', 'same@x.com'])
+
+    def test_other_constraint_failures_reach_only_their_caller(self):
+        rows = [user('a@x.com'), user('null@x.com', name=None), user('b@x.com')]
+        committer = GroupCommitter(self.backend, 'insert_user', window=5, max_rows=len(rows))
+
+        results = self.submit_together(committer, rows)
+
+        self.assertEqual(results[0], 1)
+        self.assertIsInstance(results[1], sqlite3.IntegrityError)
+        self.assertFalse(self.backend.is_duplicate(results[1]))
+        self.assertEqual(results[2], 1)
+        self.assertEqual(self.emails(), ['a@x.com', 'b@x.com'])
+
+    def test_failed_batch_fails_every_caller(self):
+        def run(fn, *args):
+            raise sqlite3.OperationalError("database is locked")
+
+        rows = [user('a@x.com'), user('b@x.com')]
+        committer = GroupCommitter(self.backend, 'insert_user', window=5, max_rows=len(rows), run=run)
+
+        results = self.submit_together(committer, rows)
+
+        self.assertTrue(all(isinstance(result, sqlite3.OperationalError) for result in results))
+        self.assertEqual(committer.stats()['failed_batches'], 1)
+        self.assertEqual(self.emails(), [])
+
+    def test_batch_is_sent_after_the_window(self):
+        committer = GroupCommitter(self.backend, 'insert_user', window=0.01, max_rows=64)
+        self.assertEqual(committer.submit(user('a@x.com')), 1)
+        committer.stop()
+        self.assertEqual(committer.stats()['batch_sizes']['<=1'], 1)
+
+    def test_rows_submitted_after_stop_are_written_alone(self):
+        committer = GroupCommitter(self.backend, 'insert_user', window=0.01, max_rows=64)
+        self.assertEqual(committer.submit(user('a@x.com')), 1)
+        committer.stop()
+
+        results = self.submit_together(committer, [user('late@x.com'), user('a@x.com')])
+
+        self.assertEqual(results, [1, 0])
+        self.assertEqual(committer.stats()['batches'], 1)
+        self.assertEqual(self.emails(), ['a@x.com', 'late@x.com'])
+
+    def test_stop_before_any_row(self):
+        committer = GroupCommitter(self.backend, 'insert_user')
+        committer.stop()
+        with self.assertRaises(sqlite3.IntegrityError):
+            committer.submit(user('null@x.com', name=None))
+
+
+if __name__ == '__main__':
+    unittest.main()
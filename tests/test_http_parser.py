@@ -0,0 +1,110 @@
+import sys
+import os
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Common'))
+
+from http_parser import RequestParser, RequestError
+
+
+def post(path, body, extra=b""):
+    return (b"POST " + path + b" HTTP/1.1\r\n"
+            b"Host: localhost\r\n"
+            b"Content-Type: application/json\r\n" + extra +
+            b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+            b"\r\n" + body)
+
+
+class PipeliningTest(unittest.TestCase):
+
+    def test_requests_in_one_chunk_come_out_in_order(self):
+        parser = RequestParser()
+        parser.feed(post(b"/api/login", b'{"n": 1}') + b"GET /api/health HTTP/1.1\r\n\r\n"
+                    + post(b"/api/signup", b'{"n": 2}'))
+
+        first = parser.next_request()
+        second = parser.next_request()
+        third = parser.next_request()
+
+        self.assertEqual((first['method'], first['path'], first['body']), ('POST', '/api/login', '{"n": 1}'))
+        self.assertEqual((second['method'], second['path'], second['body']), ('GET', '/api/health', None))
+        self.assertEqual((third['path'], third['body']), ('/api/signup', '{"n": 2}'))
+        self.assertIsNone(parser.next_request())
+        self.assertFalse(parser.has_partial_request())
+
+    def test_partial_second_request_waits_for_its_bytes(self):
+        parser = RequestParser()
+        second = post(b"/api/signup", b'{"n": 2}')
+        parser.feed(post(b"/api/login", b'{"n": 1}') + second[:20])
+
+        self.assertEqual(parser.next_request()['path'], '/api/login')
+        self.assertIsNone(parser.next_request())
+        self.assertTrue(parser.has_partial_request())
+
+        parser.feed(second[20:])
+        self.assertEqual(parser.next_request()['body'], '{"n": 2}')
+
+
+class FramingTest(unittest.TestCase):
+
+    def test_body_split_across_chunks(self):
+        raw = post(b"/api/login", b'{"email": "a@x.com", "password": "secret1"}')
+        body_start = raw.index(b"\r\n\r\n") + 4
+        parser = RequestParser()
+
+        parser.feed(raw[:body_start + 5])
+        self.assertIsNone(parser.next_request())
+        parser.feed(raw[body_start + 5:-1])
+        self.assertIsNone(parser.next_request())
+        parser.feed(raw[-1:])
+
+        request = parser.next_request()
+        self.assertEqual(request['body'], '{"email": "a@x.com", "password": "secret1"}')
+        self.assertEqual(request['headers']['content-type'], 'application/json')
+
+    def test_header_terminator_split_across_chunks(self):
+        raw = b"GET /api/health HTTP/1.1\r\nHost: localhost\r\n\r\n"
+        parser = RequestParser()
+        for i in range(len(raw) - 1):
+            parser.feed(raw[i:i + 1])
+            self.assertIsNone(parser.next_request())
+        parser.feed(raw[-1:])
+        self.assertEqual(parser.next_request()['path'], '/api/health')
+
+    def test_body_is_decoded_from_its_bytes_not_characters(self):
+        body = '{"name": "Zoë"}'.encode('utf-8')
+        parser = RequestParser()
+        parser.feed(post(b"/api/signup", body) + b"GET /api/health HTTP/1.1\r\n\r\n")
+        self.assertEqual(parser.next_request()['body'], '{"name": "Zoë"}')
+        self.assertEqual(parser.next_request()['path'], '/api/health')
+
+    def test_keep_alive_follows_version_and_connection_header(self):
+        cases = [
+            (b"HTTP/1.1", b"", True),
+            (b"HTTP/1.1", b"Connection: close\r\n", False),
+            (b"HTTP/1.0", b"", False),
+            (b"HTTP/1.0", b"Connection: Keep-Alive\r\n", True),
+        ]
+        for version, header, keep_alive in cases:
+            parser = RequestParser()
+            parser.feed(b"GET / " + version + b"\r\n" + header + b"\r\n")
+            self.assertEqual(parser.next_request()['keep_alive'], keep_alive, (version, header))
+
+    def test_rejected_requests(self):
+        cases = [
+            (post(b"/api/login", b"x" * 11), 413),
+            (b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n", 501),
+            (b"POST / HTTP/1.1\r\nContent-Length: ten\r\n\r\n", 400),
+            (b"GET /\r\n\r\n", 400),
+            (b"GET / HTTP/1.1\r\nX-Padding: " + b"a" * 200, 431),
+        ]
+        for raw, status in cases:
+            parser = RequestParser(max_header_size=128, max_body_size=10)
+            parser.feed(raw)
+            with self.assertRaises(RequestError) as caught:
+                parser.next_request()
+            self.assertEqual(caught.exception.status_code, status, raw)
+
+
+if __name__ == '__main__':
+    unittest.main()
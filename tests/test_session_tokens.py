@@ -0,0 +1,68 @@
+import sys
+import os
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Common'))
+
+from session_tokens import SessionSigner, generate_keys, parse_keys
+
+USER = {'id': 7, 'name': 'A', 'email': 'a@x.com', 'phone': '1234567890'}
+
+
+class SessionSignerTest(unittest.TestCase):
+
+    def test_issued_token_verifies(self):
+        signer = SessionSigner(generate_keys())
+        valid, message, claims = signer.verify(signer.issue(USER))
+        self.assertTrue(valid, message)
+        self.assertEqual(claims['email'], 'a@x.com')
+        self.assertEqual(claims['exp'] - claims['iat'], signer.ttl)
+
+    def test_tampered_payload_is_rejected(self):
+        signer = SessionSigner("k1:secret")
+        version, key_id, payload, signature = signer.issue(USER).split('.')
+        other = SessionSigner("k1:secret").issue(dict(USER, id=1)).split('.')[2]
+
+        self.assertEqual(signer.verify('.'.join((version, key_id, other, signature)))[:2],
+                         (False, "Invalid session token"))
+        flipped = signature[:-1] + ('A' if signature[-1] != 'A' else 'B')
+        self.assertEqual(signer.verify('.'.join((version, key_id, payload, flipped)))[:2],
+                         (False, "Invalid session token"))
+
+    def test_token_signed_with_another_secret_is_rejected(self):
+        token = SessionSigner("k1:other").issue(USER)
+        self.assertEqual(SessionSigner("k1:secret").verify(token)[:2], (False, "Invalid session token"))
+
+    def test_malformed_tokens_are_rejected(self):
+        signer = SessionSigner("k1:secret")
+        for token in ("", "v1.k1.abc", "v2.k1.abc.def", signer.issue(USER) + "é"):
+            self.assertEqual(signer.verify(token)[:2], (False, "Malformed session token"), token)
+
+    def test_expired_token_is_rejected(self):
+        signer = SessionSigner("k1:secret", ttl=-1)
+        self.assertEqual(signer.verify(signer.issue(USER))[:2], (False, "Session expired"))
+
+    def test_rotation_keeps_old_tokens_valid(self):
+        old = SessionSigner("old:secret1")
+        rotated = SessionSigner("new:secret2,old:secret1")
+        old_token = old.issue(USER)
+        new_token = rotated.issue(USER)
+
+        self.assertEqual(new_token.split('.')[1], 'new')
+        self.assertTrue(rotated.verify(old_token)[0])
+        self.assertTrue(rotated.verify(new_token)[0])
+        self.assertEqual(old.verify(new_token)[:2], (False, "Unknown session key"))
+
+    def test_retired_key_stops_verifying(self):
+        token = SessionSigner("old:secret1").issue(USER)
+        self.assertEqual(SessionSigner("new:secret2").verify(token)[:2], (False, "Unknown session key"))
+
+    def test_parse_keys(self):
+        self.assertEqual(parse_keys("a:x, b:y"), [('a', b'x'), ('b', b'y')])
+        for spec in ("a", "a:", ":x", "a.b:x"):
+            with self.assertRaises(ValueError):
+                parse_keys(spec)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import sys
+import os
+import unittest
+from unittest import mock
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Common'))
+
+import ttl_cache
+from ttl_cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TTLCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        patcher = mock.patch.object(ttl_cache.time, 'monotonic', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_full_cache_evicts_the_entry_due_soonest(self):
+        cache = TTLCache(max_entries=3)
+        cache.set('a', 1, 30)
+        cache.set('b', 2, 10)
+        cache.set('c', 3, 20)
+
+        cache.set('d', 4, 40)
+        self.assertIsNone(cache.get('b'))
+        cache.set('e', 5, 50)
+        self.assertIsNone(cache.get('c'))
+
+        self.assertEqual([cache.get(key) for key in 'ade'], [1, 4, 5])
+        self.assertEqual(cache.stats()['evictions'], 2)
+
+    def test_replaced_entry_is_ordered_by_its_new_expiry(self):
+        cache = TTLCache(max_entries=2)
+        cache.set('a', 1, 10)
+        cache.set('b', 2, 20)
+        cache.set('a', 1, 30)
+
+        cache.set('c', 3, 40)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+
+    def test_deleted_entry_does_not_count_towards_the_limit(self):
+        cache = TTLCache(max_entries=2)
+        cache.set('a', 1, 10)
+        cache.set('b', 2, 20)
+        cache.delete('a')
+
+        cache.set('c', 3, 30)
+        self.assertEqual((cache.get('b'), cache.get('c')), (2, 3))
+        self.assertEqual(cache.stats()['evictions'], 0)
+
+    def test_expired_entries_go_before_live_ones_are_evicted(self):
+        cache = TTLCache(max_entries=2)
+        cache.set('a', 1, 5)
+        cache.set('b', 2, 50)
+        self.clock.now += 10
+
+        self.assertIsNone(cache.get('a'))
+        cache.set('c', 3, 20)
+        self.assertEqual((cache.get('b'), cache.get('c')), (2, 3))
+        self.assertEqual(cache.stats()['evictions'], 0)
+        self.assertEqual(cache.stats()['expirations'], 1)
+
+    def test_stale_heap_items_are_compacted(self):
+        cache = TTLCache(max_entries=2)
+        for i in range(10):
+            cache.set('a', i, 10 + i)
+        self.assertLessEqual(len(cache._expiry), 2 * cache.max_entries)
+        self.assertEqual(cache.get('a'), 9)
+
+
+if __name__ == '__main__':
+    unittest.main()
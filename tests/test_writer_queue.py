@@ -0,0 +1,73 @@
+import sys
+import os
+import threading
+import time
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Common'))
+
+from db_backends import WriterQueue
+
+
+class WriterQueueTest(unittest.TestCase):
+
+    def wait_for_queued(self, queue, count):
+        deadline = time.monotonic() + 5
+        while queue.stats()['queued'] < count:
+            if time.monotonic() > deadline:
+                self.fail(f"{count} writers never queued")
+            time.sleep(0.001)
+
+    def test_writers_get_the_connection_in_arrival_order(self):
+        queue = WriterQueue(connection=object())
+        order = []
+
+        def write(index):
+            with queue.turn():
+                order.append(index)
+
+        threads = []
+        with queue.turn():
+            for index in range(5):
+                thread = threading.Thread(target=write, args=(index,))
+                thread.start()
+                threads.append(thread)
+                # Holder plus every writer started so far
+                self.wait_for_queued(queue, index + 2)
+        for thread in threads:
+            thread.join(timeout=5)
+
+        self.assertEqual(order, [0, 1, 2, 3, 4])
+        stats = queue.stats()
+        self.assertEqual((stats['writes'], stats['queued'], stats['waits']), (6, 0, 5))
+        self.assertEqual(stats['max_queue_depth'], 5)
+
+    def test_turn_is_reentrant_on_one_thread(self):
+        connection = object()
+        queue = WriterQueue(connection)
+        with queue.turn() as outer:
+            with queue.turn() as inner:
+                self.assertIs(inner, outer)
+            self.assertIs(outer, connection)
+        self.assertEqual(queue.stats()['writes'], 1)
+
+    def test_turn_is_released_when_the_writer_fails(self):
+        queue = WriterQueue(connection=object())
+        with self.assertRaises(RuntimeError):
+            with queue.turn():
+                raise RuntimeError("write failed")
+
+        done = threading.Event()
+
+        def write():
+            with queue.turn():
+                done.set()
+
+        thread = threading.Thread(target=write)
+        thread.start()
+        self.assertTrue(done.wait(5))
+        thread.join(timeout=5)
+
+
+if __name__ == '__main__':
+    unittest.main()